@@ -22,6 +22,8 @@ rm -f data/processed_sanitized/panel_close.csv \
       data/processed_sanitized/panel_returns.csv \
       data/processed_sanitized/baseline_equity.csv \
       data/processed_sanitized/baseline_trades.csv
+rm -f data/processed_sanitized/panel_close.parquet \
+      data/processed_sanitized/panel_returns.parquet
 rm -f data/processed_sanitized/buyhold_equity.csv \
       data/processed_sanitized/buyhold_trades.csv
 
@@ -2,12 +2,20 @@
 from __future__ import annotations
 
 import argparse
+import csv
 import sys
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
-from typing import List, Tuple
+from typing import TYPE_CHECKING, Dict, List, Tuple
 
-import pandas as pd
+if TYPE_CHECKING:  # pandas is imported where panels are built; subprocess paths do not need it
+    import pandas as pd
+
+REPO = Path(__file__).resolve().parents[1]
+if str(REPO) not in sys.path:
+    sys.path.insert(0, str(REPO))
 
 # NOTE:
 # - uses yfinance for download (inside venv)
@@ -29,6 +37,9 @@ import pandas as pd
 
 DEFAULT_TICKERS = ["SPY", "QQQ", "MSFT", "NVDA", "JNJ", "XLE", "GLD"]
 
+# Yahoo caps the number of symbols per request URL
+YF_BATCH_SIZE = 20
+
 
 def run(cmd: List[str], cwd: Path) -> None:
     print(f"\n$ {' '.join(cmd)}")
@@ -37,7 +48,87 @@ def run(cmd: List[str], cwd: Path) -> None:
         raise RuntimeError(f"Command failed with exit code {p.returncode}: {' '.join(cmd)}")
 
 
-def download_yahoo_raw(tickers: List[str], out_dir: Path, start: str | None, end: str | None) -> None:
+def run_pipe(producer: List[str], consumer: List[str], cwd: Path) -> None:
+    # producer stdout -> consumer stdin, both processes run concurrently
+    print(f"\n$ {' '.join(producer)} | {' '.join(consumer)}")
+    p1 = subprocess.Popen(producer, cwd=str(cwd), stdout=subprocess.PIPE)
+    p2 = subprocess.Popen(consumer, cwd=str(cwd), stdin=p1.stdout)
+    p1.stdout.close()  # so the producer sees a broken pipe if the consumer exits early
+    rc2 = p2.wait()
+    rc1 = p1.wait()
+    for cmd, rc in ((producer, rc1), (consumer, rc2)):
+        if rc != 0:
+            raise RuntimeError(f"Command failed with exit code {rc}: {' '.join(cmd)}")
+
+
+def _resume_raw_date(path: Path) -> str | None:
+    """
+    Date (YYYY-MM-DD) to resume a raw CSV from: its second-to-last bar, so one complete stored bar
+    is re-fetched and can be compared (the last one may have been partial). None if there is no usable file.
+    """
+    if not path.exists():
+        return None
+    with path.open("rb") as fh:
+        size = fh.seek(0, 2)
+        fh.seek(max(0, size - 4096))
+        lines = fh.read().decode("utf-8", errors="replace").strip().splitlines()
+    dates = []
+    for ln in lines[-2:]:
+        try:
+            datetime.strptime(ln[:10], "%Y-%m-%d")
+        except ValueError:
+            continue  # header line / unexpected layout
+        dates.append(ln[:10])
+    return dates[0] if dates else None  # header only -> full download
+
+
+def _merge_raw(path: Path, new: pd.DataFrame) -> bool:
+    """
+    Keep the header block and bars before the first downloaded one, then append the download.
+    Returns False (file untouched) when the re-fetched stored bars no longer match the file.
+    """
+    import numpy as np
+    import pandas as pd
+
+    first_new = new.index.min().strftime("%Y-%m-%d")
+    lines = path.read_text(encoding="utf-8").splitlines(keepends=True)
+    kept = [ln for ln in lines if not ln[:4].isdigit() or ln[:10] < first_new]
+
+    # the appended rows must follow the file's column order, not the order of this download:
+    # one header line per column level (the "Date,,,," index-name line has no labels)
+    label_rows = [
+        row[1:] for row in csv.reader(ln for ln in lines if not ln[:4].isdigit())
+        if any(row[1:])
+    ]
+    if new.columns.nlevels > 1:
+        cols = pd.MultiIndex.from_tuples(list(zip(*label_rows)), names=new.columns.names)
+    else:
+        cols = pd.Index(label_rows[0], name=new.columns.name)
+    if len(label_rows) != new.columns.nlevels or set(cols) != set(new.columns):
+        raise RuntimeError(f"{path.name}: downloaded columns {list(new.columns)} do not match the file header; rerun with --full-refresh")
+
+    # Yahoo re-bases prices over the whole history after a dividend or split: the re-fetched
+    # stored bars (all but the last, which may have been partial) must still match, otherwise
+    # appending would mix two adjustment bases in one file
+    stored = list(csv.reader(ln for ln in lines if ln[:4].isdigit() and ln[:10] >= first_new))[:-1]
+    if stored:
+        prices = np.asarray(cols.get_level_values(-1) != "Volume")
+        old = np.array([[float(x) if x else np.nan for x in row[1:]] for row in stored])
+        fresh = new.reindex(index=pd.to_datetime([row[0] for row in stored]), columns=cols).to_numpy(dtype=np.float64)
+        if not np.allclose(old[:, prices], fresh[:, prices], rtol=1e-6, atol=0.0, equal_nan=True):
+            return False
+
+    path.write_text("".join(kept) + new.reindex(columns=cols).to_csv(header=False), encoding="utf-8")
+    return True
+
+
+def download_yahoo_raw(
+    tickers: List[str],
+    out_dir: Path,
+    start: str | None,
+    end: str | None,
+    full_refresh: bool = False,
+) -> None:
     out_dir.mkdir(parents=True, exist_ok=True)
     try:
         import yfinance as yf  # type: ignore
@@ -46,29 +137,90 @@ def download_yahoo_raw(tickers: List[str], out_dir: Path, start: str | None, end
             "yfinance not available. Activate venv and install: python -m pip install yfinance"
         ) from e
 
+    # Incremental by default: a ticker with a raw CSV resumes from its second-to-last bar
+    # (see _resume_raw_date); others get the full history from `start`.
+    resumed: Dict[str, str] = {}
+    if not full_refresh:
+        for t in tickers:
+            last = _resume_raw_date(out_dir / f"{t}.csv")
+            if last is not None:
+                resumed[t] = last
+    rebased: List[str] = []
+
+    groups: Dict[str | None, List[str]] = {}
     for t in tickers:
-        print(f"Downloading {t}...")
-        df = yf.download(
-            t,
-            start=start,
-            end=end,
-            auto_adjust=False,
-            group_by="ticker",   # produces MultiIndex columns -> similar to what your normalizer already handled
-            progress=True,
-            actions=False,
-            threads=False,
-        )
-
-        if df is None or len(df) == 0:
-            raise RuntimeError(f"Download returned empty dataframe for ticker={t}")
-
-        out_path = out_dir / f"{t}.csv"
-        df.to_csv(out_path)
-        print(f"Saved to {out_path}")
+        groups.setdefault(resumed.get(t, start), []).append(t)
+
+    # one multi-ticker request per batch; yfinance fetches the batch on its own thread pool
+    for group_start, group in groups.items():
+        for i in range(0, len(group), YF_BATCH_SIZE):
+            batch = group[i:i + YF_BATCH_SIZE]
+            print(f"Downloading {' '.join(batch)} (start={group_start})...")
+            df = yf.download(
+                batch,
+                start=group_start,
+                end=end,
+                auto_adjust=False,
+                group_by="ticker",   # produces MultiIndex columns -> similar to what your normalizer already handled
+                progress=True,
+                actions=False,
+                threads=True,
+            )
+
+            if (df is None or len(df) == 0) and not all(t in resumed for t in batch):
+                raise RuntimeError(f"Download returned empty dataframe for tickers={batch}")
+
+            for t in batch:
+                # df[[t]] keeps the (Ticker, Price) column levels of a single-ticker download;
+                # rows where only other tickers traded are dropped
+                has_t = df is not None and len(df) > 0 and t in df.columns.get_level_values(0)
+                sub = df[[t]].dropna(how="all") if has_t else None
+                out_path = out_dir / f"{t}.csv"
+
+                if sub is None or len(sub) == 0:
+                    if t in resumed:
+                        print(f"{t}: no new bars since {resumed[t]}")
+                        continue
+                    raise RuntimeError(f"Download returned empty dataframe for ticker={t}")
+
+                if t in resumed:
+                    if _merge_raw(out_path, sub):
+                        print(f"Updated {out_path} ({len(sub)} bar(s) from {resumed[t]})")
+                    else:
+                        print(f"{t}: stored bars differ from Yahoo's (history re-adjusted); re-downloading from {start}")
+                        rebased.append(t)
+                else:
+                    sub.to_csv(out_path)
+                    print(f"Saved to {out_path}")
+
+    if rebased:
+        download_yahoo_raw(rebased, out_dir, start, end, full_refresh=True)
+
+
+def _load_close_series(f: Path) -> pd.Series:
+    # Arrow's multithreaded CSV reader; only Date + close are parsed, typed at read time
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+
+    opts = pacsv.ConvertOptions(
+        include_columns=["Date", "close"],
+        column_types={"Date": pa.timestamp("ns"), "close": pa.float64()},
+    )
+    try:
+        df = pacsv.read_csv(f, convert_options=opts).to_pandas()
+    except (ValueError, KeyError) as e:  # ArrowInvalid / ArrowKeyError
+        raise ValueError(f"{f.name}: cannot read Date/close: {e}") from e
+    s = df.sort_values("Date").drop_duplicates("Date").set_index("Date")["close"]
+    s.name = f.stem.upper()
+    return s
 
 
 def build_panels_from_sanitized(sanitized_dir: Path) -> Tuple[Path, Path, List[str]]:
     # read sanitized OHLCV, build aligned close panel (inner join on dates)
+    import pandas as pd
+
+    from engine.storage.frame_io import write_parquet_sibling
+
     files = sorted(
         f for f in sanitized_dir.glob("*.csv")
         if f.is_file() and not f.name.startswith("_") and "log" not in f.name.lower()
@@ -76,32 +228,27 @@ def build_panels_from_sanitized(sanitized_dir: Path) -> Tuple[Path, Path, List[s
     if not files:
         raise RuntimeError(f"No sanitized CSV files found in {sanitized_dir}")
 
-    series_list = []
-    assets = []
-    for f in files:
-        asset = f.stem.upper()
-        df = pd.read_csv(f, parse_dates=["Date"])
-        if "close" not in df.columns:
-            raise ValueError(f"{f.name}: missing 'close' column, columns={list(df.columns)}")
-        s = df[["Date", "close"]].copy()
-        s["close"] = pd.to_numeric(s["close"], errors="coerce")
-        if s["close"].isna().any():
-            raise ValueError(f"{f.name}: NaNs in close after numeric coercion")
-        s = s.sort_values("Date").drop_duplicates("Date").set_index("Date")["close"]
-        s.name = asset
-        assets.append(asset)
-        series_list.append(s)
+    # files are independent and mostly I/O: read them concurrently
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        series_list = list(ex.map(_load_close_series, files))
+    assets = [s.name for s in series_list]
 
     close_panel = pd.concat(series_list, axis=1, join="inner").sort_index()
     if close_panel.isna().any().any():
-        raise ValueError("panel_close contains NaNs after join (unexpected for sanitized data)")
+        bad = close_panel.isna().sum()
+        raise ValueError(f"panel_close contains NaNs (unexpected for sanitized data): {bad[bad > 0].to_dict()}")
 
-    returns_panel = close_panel.pct_change().dropna()
+    # simple returns in one pass over the float64 block (panel is NaN-free, so no dropna needed)
+    arr = close_panel.to_numpy(dtype="float64", copy=False)
+    returns_panel = pd.DataFrame(arr[1:] / arr[:-1] - 1.0, index=close_panel.index[1:], columns=close_panel.columns)
 
     out_close = sanitized_dir / "panel_close.csv"
     out_ret = sanitized_dir / "panel_returns.csv"
-    close_panel.to_csv(out_close, index_label="Date")
-    returns_panel.to_csv(out_ret, index_label="Date")
+    # full repr precision: the CSV and its Parquet sibling must hold the same values
+    close_panel.to_csv(out_close, index_label="Date", lineterminator="\n")
+    returns_panel.to_csv(out_ret, index_label="Date", lineterminator="\n")
+    write_parquet_sibling(close_panel, out_close)
+    write_parquet_sibling(returns_panel, out_ret)
 
     print(f"OK: assets={assets}")
     print(f"Saved close panel  -> {out_close} (rows={len(close_panel)})")
@@ -120,10 +267,20 @@ def main() -> int:
     ap.add_argument("--sanitized-dir", default="data/processed_sanitized", help="Processed sanitized directory")
     ap.add_argument("--sanitizer-log", default="data/processed_sanitized/_sanitizer_log.csv", help="Sanitizer log CSV path")
     ap.add_argument("--skip-download", action="store_true", help="Skip yfinance download step")
+    ap.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="Re-download full history from --start instead of only bars after the last one in --raw-dir",
+    )
     ap.add_argument("--skip-baseline", action="store_true", help="Skip baseline portfolio step")
     ap.add_argument("--fee-bps", type=float, default=5.0, help="Baseline: variable fee in bps (default 5)")
     ap.add_argument("--slippage-bps", type=float, default=2.0, help="Baseline: slippage in bps (default 2)")
     ap.add_argument("--fixed", type=float, default=0.0, help="Baseline: fixed cost per trade/order (default 0)")
+    ap.add_argument(
+        "--stream",
+        action="store_true",
+        help="Pipe normalize -> sanitize as Arrow IPC instead of writing data/processed CSVs (needs pyarrow)",
+    )
     args = ap.parse_args()
 
     repo = Path.cwd()
@@ -135,26 +292,40 @@ def main() -> int:
 
     # 1) Download
     if not args.skip_download:
-        download_yahoo_raw(args.tickers, raw_dir, args.start, args.end)
+        download_yahoo_raw(args.tickers, raw_dir, args.start, args.end, full_refresh=args.full_refresh)
     else:
         print("Skipping download (--skip-download).")
 
-    # 2) Normalize raw -> processed
-    # normalize_yahoo.py uses data/raw and writes to data/processed in your current flow
-    run([sys.executable, "engine/datasource/normalize_yahoo.py"], cwd=repo)
-
-    # 3) Sanitize processed -> sanitized
     sanitized_dir.mkdir(parents=True, exist_ok=True)
-    run(
-        [
-            sys.executable,
-            "engine/datasource/sanitize_ohlc.py",
-            "--in-dir", str(processed_dir),
-            "--out-dir", str(sanitized_dir),
-            "--log", str(sanitizer_log),
-        ],
-        cwd=repo,
-    )
+    if args.stream:
+        # 2+3) Normalize raw -> sanitize, streamed; data/processed is not written
+        run_pipe(
+            [sys.executable, "engine/datasource/normalize_yahoo.py", "--arrow-stdout"],
+            [
+                sys.executable,
+                "engine/datasource/sanitize_ohlc.py",
+                "--arrow-stdin",
+                "--out-dir", str(sanitized_dir),
+                "--log", str(sanitizer_log),
+            ],
+            cwd=repo,
+        )
+    else:
+        # 2) Normalize raw -> processed
+        # normalize_yahoo.py uses data/raw and writes to data/processed in your current flow
+        run([sys.executable, "engine/datasource/normalize_yahoo.py"], cwd=repo)
+
+        # 3) Sanitize processed -> sanitized
+        run(
+            [
+                sys.executable,
+                "engine/datasource/sanitize_ohlc.py",
+                "--in-dir", str(processed_dir),
+                "--out-dir", str(sanitized_dir),
+                "--log", str(sanitizer_log),
+            ],
+            cwd=repo,
+        )
 
     # 4) Data quality (spy calendar)
     run(
@@ -2,12 +2,16 @@
 from __future__ import annotations
 
 import argparse
+import csv
 import json
+import os
 import sqlite3
 from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional, Sequence
 
 import pandas as pd
 
@@ -58,6 +62,26 @@ CREATE TABLE IF NOT EXISTS last_returns (
 """
 
 
+# Newer runs columns, added to older DBs on init: name -> column definition.
+# Some schemas already have NOT NULL universe; adding only missing ones is safe/idempotent.
+RUNS_EXTRA_COLUMNS = {
+    "report_dir": "report_dir TEXT",
+    "note": "note TEXT",
+    "universe": "universe TEXT",
+}
+
+# CSV columns read by the ingest, in the order they are bound (after run_id)
+# to the matching DB columns below.
+EQUITY_CSV_COLS = ("Date", "equity", "cash")
+EQUITY_DB_COLS = ("run_id", "date", "equity", "cash")
+TRADES_CSV_COLS = ("Date", "asset", "side", "qty", "price", "notional", "fee_total")
+TRADES_DB_COLS = ("run_id", "date", "asset", "side", "qty", "price", "notional", "fee_total")
+LAST_RETURNS_DB_COLS = ("run_id", "asset", "ret")
+
+# Bound parameters per statement; 999 is the limit of older SQLite builds.
+SQLITE_MAX_VARS = 999
+
+
 @dataclass
 class Inputs:
     report_dir: Path
@@ -71,11 +95,12 @@ class Inputs:
 def _pick_latest_report(reports_root: Path) -> Path:
     if not reports_root.exists():
         raise FileNotFoundError(f"reports root not found: {reports_root}")
-    candidates = [p for p in reports_root.iterdir() if p.is_dir()]
+    # scandir entries carry their type, so is_dir() needs no extra stat()
+    with os.scandir(reports_root) as it:
+        candidates = [e.name for e in it if e.is_dir()]
     if not candidates:
         raise FileNotFoundError(f"no report dirs found in: {reports_root}")
-    candidates.sort(key=lambda p: p.name)  # expects YYYY-MM-DD
-    return candidates[-1]
+    return reports_root / max(candidates)  # expects YYYY-MM-DD
 
 
 def _resolve_inputs(repo: Path, report_dir: Optional[Path]) -> Inputs:
@@ -85,17 +110,6 @@ def _resolve_inputs(repo: Path, report_dir: Optional[Path]) -> Inputs:
     baseline_trades = repo / "data" / "processed_sanitized" / "baseline_trades.csv"
     panel_returns = repo / "data" / "processed_sanitized" / "panel_returns.csv"
 
-    # (optional) check presence of core inputs early (kept, but now valid)
-    missing = [
-        str(p) for p in (
-            baseline_equity,
-            baseline_trades,
-            panel_returns,
-            panel_close,
-        )
-        if not p.exists()
-    ]
-
     if report_dir is None:
         report_dir = _pick_latest_report(repo / "reports" / "daily")
     report_dir = report_dir.resolve()
@@ -121,6 +135,13 @@ def _connect(db_path: Path) -> sqlite3.Connection:
     db_path.parent.mkdir(parents=True, exist_ok=True)
     con = sqlite3.connect(str(db_path))
     con.execute("PRAGMA foreign_keys=ON;")
+    # Write-throughput settings: WAL + NORMAL sync fsyncs only at checkpoints,
+    # bigger page cache (64 MiB) and mmap (256 MiB) for the bulk upserts.
+    con.execute("PRAGMA journal_mode=WAL;")
+    con.execute("PRAGMA synchronous=NORMAL;")
+    con.execute("PRAGMA temp_store=MEMORY;")
+    con.execute("PRAGMA cache_size=-65536;")
+    con.execute("PRAGMA mmap_size=268435456;")
     return con
 
 
@@ -130,24 +151,23 @@ def _table_columns(con: sqlite3.Connection, table: str) -> set[str]:
     return {r[1] for r in rows}
 
 
-def _ensure_column(con: sqlite3.Connection, table: str, col: str, col_def: str) -> None:
-    cols = _table_columns(con, table)
-    if col in cols:
-        return
-    con.execute(f"ALTER TABLE {table} ADD COLUMN {col_def}")
-    con.commit()
-
-
-def _init_db(con: sqlite3.Connection) -> None:
+def _init_db(con: sqlite3.Connection) -> set[str]:
+    """Create/migrate the schema; returns the runs table columns."""
     # Create base tables (or keep existing)
     con.executescript(SCHEMA_SQL)
     con.commit()
 
     # Migrate runs table if it exists but is missing newer columns
-    _ensure_column(con, "runs", "report_dir", "report_dir TEXT")
-    _ensure_column(con, "runs", "note", "note TEXT")
-    # Some schemas already have NOT NULL universe; this is safe/idempotent.
-    _ensure_column(con, "runs", "universe", "universe TEXT")
+    cols = _table_columns(con, "runs")
+    missing = [c for c in RUNS_EXTRA_COLUMNS if c not in cols]
+    if missing:
+        with con:
+            # DDL does not open an implicit transaction; batch the ALTERs explicitly
+            con.execute("BEGIN")
+            for c in missing:
+                con.execute(f"ALTER TABLE runs ADD COLUMN {RUNS_EXTRA_COLUMNS[c]}")
+        cols |= set(missing)
+    return cols
 
 
 def _infer_asof_date(report_dir: Path) -> str:
@@ -169,14 +189,40 @@ def _infer_asof_date(report_dir: Path) -> str:
     return datetime.now().strftime("%Y-%m-%d")
 
 
+def _read_csv_last_row(path: Path, block: int = 4096) -> tuple[list[str], list[str]]:
+    """
+    Return (header, last row) of a CSV without reading the rows in between:
+    seek back from the end until the final line is complete.
+    """
+    with path.open("rb") as fh:
+        header_line = fh.readline()
+        header_end = fh.tell()
+        size = fh.seek(0, 2)
+        while True:
+            start = max(header_end, size - block)
+            fh.seek(start)
+            tail = fh.read().rstrip(b"\r\n")
+            if start == header_end or b"\n" in tail:
+                break
+            block *= 2
+    if not tail:
+        raise ValueError(f"no data rows in: {path}")
+    last_line = tail.rsplit(b"\n", 1)[-1]
+    header, last = csv.reader([header_line.decode("utf-8"), last_line.decode("utf-8")])
+    return header, last
+
+
 def _load_last_returns(panel_returns: Path) -> pd.Series:
-    df = pd.read_csv(panel_returns)
-    if "Date" not in df.columns:
-        raise ValueError(f"panel_returns missing Date column: {panel_returns}")
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-    df = df.dropna(subset=["Date"]).sort_values("Date")
-    last = df.iloc[-1]
-    s = last.drop(labels=["Date"])
+    # prefer the Parquet sibling written by the panel build when it is not older than the CSV
+    pq_path = panel_returns.with_suffix(".parquet")
+    if pq_path.exists() and pq_path.stat().st_mtime >= panel_returns.stat().st_mtime:
+        s = pd.read_parquet(pq_path).sort_index().iloc[-1]
+    else:
+        # panel CSVs are written sorted by Date, so the last line is the latest day
+        header, last = _read_csv_last_row(panel_returns)
+        if "Date" not in header:
+            raise ValueError(f"panel_returns missing Date column: {panel_returns}")
+        s = pd.Series(last, index=header).drop(labels=["Date"])
     s = pd.to_numeric(s, errors="coerce").dropna()
     return s
 
@@ -187,11 +233,13 @@ def _insert_run(
     report_dir: Path,
     universe: str,
     note: Optional[str],
+    cols: Optional[set[str]] = None,
 ) -> int:
     created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     # Be robust to schema drift: insert only columns that exist.
-    cols = _table_columns(con, "runs")
+    if cols is None:
+        cols = _table_columns(con, "runs")
 
     fields: list[str] = []
     values: list[object] = []
@@ -210,69 +258,100 @@ def _insert_run(
 
     sql = f"INSERT INTO runs({', '.join(fields)}) VALUES ({', '.join(['?'] * len(fields))})"
     cur = con.execute(sql, values)
-    con.commit()
     return int(cur.lastrowid)
 
 
+@lru_cache(maxsize=None)
+def _insert_sql(verb: str, table: str, cols: tuple[str, ...], nrows: int) -> str:
+    # built once per (table, row count); the identical string hits sqlite3's statement cache
+    group = "(" + ", ".join(["?"] * len(cols)) + ")"
+    return f"{verb} INTO {table}({', '.join(cols)}) VALUES " + ", ".join([group] * nrows)
+
+
+def _bulk_insert(
+    con: sqlite3.Connection,
+    table: str,
+    cols: Sequence[str],
+    rows: Iterable[Sequence],
+    verb: str = "INSERT OR REPLACE",
+    chunk: int = 500,
+) -> int:
+    """
+    Insert rows using multi-row VALUES statements (N rows bound per statement),
+    so SQLite runs the statement once per chunk instead of once per row.
+    Rows are consumed lazily, one chunk at a time.
+    """
+    cols = tuple(cols)
+    chunk = max(1, min(chunk, SQLITE_MAX_VARS // len(cols)))
+
+    it = iter(rows)
+    n = 0
+    while True:
+        batch = list(islice(it, chunk))
+        if not batch:
+            break
+        n += len(batch)
+        # full chunks reuse one prepared statement; leftovers get one sized to the remainder
+        con.execute(_insert_sql(verb, table, cols, len(batch)), [v for row in batch for v in row])
+    return n
+
+
+def _csv_column_index(reader: Iterable[list[str]], need: Sequence[str], label: str) -> list[int]:
+    # consume the header row and locate the needed columns
+    header = next(iter(reader), [])
+    if not set(need).issubset(header):
+        raise ValueError(f"{label} unexpected columns: {header}")
+    return [header.index(c) for c in need]
+
+
 def _upsert_equity(con: sqlite3.Connection, run_id: int, equity_csv: Path) -> int:
-    df = pd.read_csv(equity_csv)
-    if not {"Date", "equity", "cash"}.issubset(set(df.columns)):
-        raise ValueError(f"baseline_equity.csv unexpected columns: {list(df.columns)}")
-
-    rows = [(run_id, str(r["Date"]), float(r["equity"]), float(r["cash"])) for _, r in df[["Date", "equity", "cash"]].iterrows()]
-    con.executemany(
-        "INSERT OR REPLACE INTO equity(run_id, date, equity, cash) VALUES (?, ?, ?, ?)",
-        rows,
-    )
-    con.commit()
-    return len(rows)
+    # stream the CSV straight into SQLite; only Date/equity/cash are converted
+    with equity_csv.open(newline="", encoding="utf-8") as fh:
+        reader = csv.reader(fh)
+        i_date, i_eq, i_cash = _csv_column_index(reader, EQUITY_CSV_COLS, "baseline_equity.csv")
+        rows = ((run_id, r[i_date], float(r[i_eq]), float(r[i_cash])) for r in reader)
+        return _bulk_insert(con, "equity", EQUITY_DB_COLS, rows)
 
 
 def _upsert_trades(con: sqlite3.Connection, run_id: int, trades_csv: Path) -> int:
-    df = pd.read_csv(trades_csv)
-    need = {"Date", "asset", "side", "qty", "price", "notional", "fee_total"}
-    if not need.issubset(set(df.columns)):
-        raise ValueError(f"baseline_trades.csv unexpected columns: {list(df.columns)}")
-
-    rows = []
-    for _, r in df[list(need)].iterrows():
-        rows.append(
+    with trades_csv.open(newline="", encoding="utf-8") as fh:
+        reader = csv.reader(fh)
+        i_date, i_asset, i_side, i_qty, i_price, i_notional, i_fee = _csv_column_index(
+            reader, TRADES_CSV_COLS, "baseline_trades.csv"
+        )
+        rows = (
             (
                 run_id,
-                str(r["Date"]),
-                str(r["asset"]),
-                str(r["side"]),
-                float(r["qty"]),
-                float(r["price"]),
-                float(r["notional"]),
-                float(r["fee_total"]),
+                r[i_date],
+                r[i_asset],
+                r[i_side],
+                float(r[i_qty]),
+                float(r[i_price]),
+                float(r[i_notional]),
+                float(r[i_fee]),
             )
+            for r in reader
+        )
+        return _bulk_insert(
+            con,
+            "trades",
+            TRADES_DB_COLS,
+            rows,
+            verb="INSERT",
         )
-
-    con.executemany(
-        "INSERT INTO trades(run_id, date, asset, side, qty, price, notional, fee_total) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-        rows,
-    )
-    con.commit()
-    return len(rows)
 
 
 def _upsert_last_returns(con: sqlite3.Connection, run_id: int, last_returns: pd.Series) -> int:
     rows = [(run_id, str(asset), float(ret)) for asset, ret in last_returns.items()]
-    con.executemany(
-        "INSERT OR REPLACE INTO last_returns(run_id, asset, ret) VALUES (?, ?, ?)",
-        rows,
-    )
-    con.commit()
-    return len(rows)
+    return _bulk_insert(con, "last_returns", LAST_RETURNS_DB_COLS, rows)
 
 def _infer_universe(panel_close: Path) -> str:
     """
     Returns universe as comma-separated string, e.g.:
     'GLD,JNJ,MSFT,NVDA,QQQ,SPY,XLE'
     """
-    df = pd.read_csv(panel_close, nrows=1)
-    cols = [c for c in df.columns if c != "Date"]
+    # header line only; no data row is parsed
+    cols = [c for c in pd.read_csv(panel_close, nrows=0).columns if c != "Date"]
     if not cols:
         raise ValueError("Cannot infer universe: no asset columns found")
     return ",".join(cols)
@@ -301,20 +380,25 @@ def main() -> int:
 
     con = _connect(db_path)
     try:
-        _init_db(con)
+        runs_cols = _init_db(con)
 
-        # FIX: pass universe into _insert_run
-        run_id = _insert_run(
-            con,
-            asof_date=asof_date,
-            report_dir=inputs.report_dir,
-            universe=universe,
-            note=args.note,
-        )
-        n_eq = _upsert_equity(con, run_id, inputs.baseline_equity)
-        n_tr = _upsert_trades(con, run_id, inputs.baseline_trades)
         last_ret = _load_last_returns(inputs.panel_returns)
-        n_lr = _upsert_last_returns(con, run_id, last_ret)
+
+        # One transaction for the whole run: a single commit (fsync) instead of
+        # one per table, and no half-ingested run if any step fails.
+        with con:
+            # FIX: pass universe into _insert_run
+            run_id = _insert_run(
+                con,
+                asof_date=asof_date,
+                report_dir=inputs.report_dir,
+                universe=universe,
+                note=args.note,
+                cols=runs_cols,
+            )
+            n_eq = _upsert_equity(con, run_id, inputs.baseline_equity)
+            n_tr = _upsert_trades(con, run_id, inputs.baseline_trades)
+            n_lr = _upsert_last_returns(con, run_id, last_ret)
 
         print("OK: ingested")
         print(f" db={db_path}")
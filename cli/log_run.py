@@ -6,6 +6,9 @@ import json
 from pathlib import Path
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pacsv
 
 from engine.storage.db import insert_run
 
@@ -23,9 +26,14 @@ def main() -> int:
     ap.add_argument("--pipeline-version", default="v1")
     args = ap.parse_args()
 
-    close = pd.read_csv(args.panel_close, parse_dates=["Date"])
-    asof_date = close["Date"].max().strftime("%Y-%m-%d")
-    universe = [c for c in close.columns if c != "Date"]
+    # only the header and the Date column are needed, not the prices
+    header = pd.read_csv(args.panel_close, nrows=0).columns
+    universe = [c for c in header if c != "Date"]
+    dates = pacsv.read_csv(
+        args.panel_close,
+        convert_options=pacsv.ConvertOptions(include_columns=["Date"], column_types={"Date": pa.date32()}),
+    ).column("Date")
+    asof_date = pc.max(dates).as_py().strftime("%Y-%m-%d")
 
     baseline_summary = json.loads(Path(args.baseline_summary).read_text())
     market_summary = json.loads(Path(args.market_summary).read_text())
@@ -5,9 +5,18 @@ import argparse
 import json
 from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING
 
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+
+if TYPE_CHECKING:  # matplotlib is imported only once charts are drawn
+    import matplotlib.pyplot as plt
+
+try:
+    import bottleneck as bn  # optional: C moving-window stats
+except ImportError:
+    bn = None
 
 
 @dataclass
@@ -18,22 +27,47 @@ class Paths:
     out_dir: Path
 
 
+def read_csv_dated(path: Path, columns: list[str] | None = None) -> pd.DataFrame:
+    # Arrow's multithreaded CSV reader; Date parsed at read time, returns a Date-sorted index
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+
+    opts = pacsv.ConvertOptions(include_columns=columns or [], column_types={"Date": pa.timestamp("ns")})
+    df = pacsv.read_csv(path, convert_options=opts).to_pandas()
+    return df.sort_values("Date").set_index("Date")
+
+
+def read_panel(path: Path) -> pd.DataFrame:
+    # prefer the Parquet sibling written by the panel build when it is not older than the CSV
+    pq_path = path.with_suffix(".parquet")
+    if pq_path.exists() and pq_path.stat().st_mtime >= path.stat().st_mtime:
+        return pd.read_parquet(pq_path).sort_index()
+    return read_csv_dated(path)
+
+
+def drawdown(series: pd.Series) -> pd.Series:
+    a = series.to_numpy(dtype=float)
+    return pd.Series(a / np.maximum.accumulate(a) - 1.0, index=series.index)
+
+
 def max_drawdown(series: pd.Series) -> float:
-    peak = series.cummax()
-    dd = series / peak - 1.0
-    return float(dd.min())
+    a = series.to_numpy(dtype=float)
+    return float((a / np.maximum.accumulate(a) - 1.0).min())
 
 
 def rolling_vol(daily_returns: pd.Series, window: int = 63) -> pd.Series:
     # 63 ~ 3 měsíce obchodních dnů
+    if bn is not None:
+        a = daily_returns.to_numpy(dtype=float)
+        std = bn.move_std(a, window, min_count=window, ddof=1)
+        return pd.Series(std * (252 ** 0.5), index=daily_returns.index)
     return daily_returns.rolling(window).std() * (252 ** 0.5)
 
 
-def save_plot(path: Path) -> None:
+def save_plot(fig: plt.Figure, path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    plt.tight_layout()
-    plt.savefig(path, dpi=140)
-    plt.close()
+    fig.tight_layout()
+    fig.savefig(path, dpi=140)
 
 
 def main() -> int:
@@ -49,10 +83,10 @@ def main() -> int:
     baseline_equity = Path(args.baseline_equity)
 
     # --- load ---
-    close = pd.read_csv(panel_close, parse_dates=["Date"]).sort_values("Date").set_index("Date")
-    rets = pd.read_csv(panel_returns, parse_dates=["Date"]).sort_values("Date").set_index("Date")
+    close = read_panel(panel_close)
+    rets = read_panel(panel_returns)
 
-    eq = pd.read_csv(baseline_equity, parse_dates=["Date"]).sort_values("Date").set_index("Date")
+    eq = read_csv_dated(baseline_equity, columns=["Date", "equity"])
     equity = eq["equity"].astype(float)
 
     asof = equity.index.max().strftime("%Y-%m-%d")
@@ -64,7 +98,8 @@ def main() -> int:
     last_ret = rets.iloc[-1].to_dict()
 
     # baseline stats
-    daily_eq_ret = equity.pct_change().dropna()
+    eq_arr = equity.to_numpy()
+    daily_eq_ret = pd.Series(eq_arr[1:] / eq_arr[:-1] - 1.0, index=equity.index[1:])
     years = (equity.index.max() - equity.index.min()).days / 365.25
     cagr = (equity.iloc[-1] / equity.iloc[0]) ** (1.0 / years) - 1.0 if years > 0 else 0.0
     vol = float(daily_eq_ret.std() * (252 ** 0.5))
@@ -90,26 +125,34 @@ def main() -> int:
     (out_dir / "market_summary.json").write_text(json.dumps(market_summary, indent=2), encoding="utf-8")
     (out_dir / "baseline_summary.json").write_text(json.dumps(baseline_summary, indent=2), encoding="utf-8")
 
-    # --- charts ---
-    plt.figure()
-    equity.plot()
-    plt.title("Baseline equity curve")
-    plt.ylabel("Equity")
-    save_plot(out_dir / "equity.png")
+    # --- charts (one figure, axes cleared between charts) ---
+    import matplotlib
+
+    matplotlib.use("Agg")  # file output only; skips interactive backend selection
+    import matplotlib.pyplot as plt
 
-    dd = equity / equity.cummax() - 1.0
-    plt.figure()
-    dd.plot()
-    plt.title("Drawdown")
-    plt.ylabel("Drawdown")
-    save_plot(out_dir / "drawdown.png")
+    fig, ax = plt.subplots()
+
+    equity.plot(ax=ax)
+    ax.set_title("Baseline equity curve")
+    ax.set_ylabel("Equity")
+    save_plot(fig, out_dir / "equity.png")
+
+    dd = drawdown(equity)
+    ax.clear()
+    dd.plot(ax=ax)
+    ax.set_title("Drawdown")
+    ax.set_ylabel("Drawdown")
+    save_plot(fig, out_dir / "drawdown.png")
 
     rv = rolling_vol(daily_eq_ret, window=63)
-    plt.figure()
-    rv.plot()
-    plt.title("Rolling volatility (63d)")
-    plt.ylabel("Volatility (annualized)")
-    save_plot(out_dir / "rolling_vol.png")
+    ax.clear()
+    rv.plot(ax=ax)
+    ax.set_title("Rolling volatility (63d)")
+    ax.set_ylabel("Volatility (annualized)")
+    save_plot(fig, out_dir / "rolling_vol.png")
+
+    plt.close(fig)
 
     # --- markdown report (lidské čtení) ---
     md = []
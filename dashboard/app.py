@@ -15,8 +15,10 @@ from __future__ import annotations
 
 import sys
 import sqlite3
+from contextlib import closing
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
@@ -98,11 +100,117 @@ def init_min_schema(con: sqlite3.Connection) -> None:
             PRIMARY KEY (run_id, asset),
             FOREIGN KEY (run_id) REFERENCES runs(id) ON DELETE CASCADE
         );
+
+        -- covering indexes: equity curve and latest trades are served from the index alone
+        CREATE INDEX IF NOT EXISTS idx_equity_cover ON equity(run_id, date, equity, cash);
+        CREATE INDEX IF NOT EXISTS idx_trades_run_date ON trades(run_id, date DESC, asset);
         """
     )
+    # planner statistics for the covering indexes, also on a DB analyzed before they existed
+    analyzed = set()
+    if table_exists(con, "sqlite_stat1"):
+        analyzed = {r[0] for r in con.execute("SELECT idx FROM sqlite_stat1")}
+    if not {"idx_equity_cover", "idx_trades_run_date"} <= analyzed:
+        con.execute("ANALYZE")
     con.commit()
 
 
+def db_version() -> int:
+    # freshness token for cached reads; WAL commits touch the -wal file, not the DB file
+    wal = DB_PATH.with_name(DB_PATH.name + "-wal")
+    return max(p.stat().st_mtime_ns for p in (DB_PATH, wal) if p.exists())
+
+
+@st.cache_data(show_spinner=False)
+def compute_drawdown(run_id: object, db_mtime_ns: int, _eq: np.ndarray) -> np.ndarray:
+    # keyed on (run, DB mtime); the equity array itself is not hashed
+    return _eq / np.maximum.accumulate(_eq) - 1.0
+
+
+@st.cache_resource
+def get_connection() -> sqlite3.Connection:
+    # one connection reused across reruns; schema first, then switch to read-only tuning
+    con = sqlite3.connect(str(DB_PATH), check_same_thread=False)
+    init_min_schema(con)
+    con.executescript(
+        """
+        PRAGMA synchronous=NORMAL;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA cache_size=-65536;
+        PRAGMA mmap_size=268435456;
+        PRAGMA query_only=ON;
+        """
+    )
+    return con
+
+
+# -----------------------------
+# Cached loaders (key: run_id + db_version(); only a DB write invalidates them)
+# -----------------------------
+def _ro_connect() -> sqlite3.Connection:
+    con = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+    con.execute("PRAGMA mmap_size=268435456")
+    return con
+
+
+def _index_by_date(df: pd.DataFrame) -> pd.DataFrame:
+    df["date"] = pd.to_datetime(df["date"], format="%Y-%m-%d", errors="coerce")
+    return df.dropna(subset=["date"]).sort_values("date").set_index("date")
+
+
+@st.cache_data(show_spinner=False)
+def load_runs(version: int) -> pd.DataFrame:
+    with closing(_ro_connect()) as con:
+        if not table_exists(con, "runs"):
+            return pd.DataFrame()
+        cols = columns(con, "runs")
+        sel_cols = [c for c in ["id", "asof_date", "created_at", "universe", "note", "report_dir"] if c in cols]
+        if "id" not in sel_cols:
+            sel_cols = ["rowid"] + sel_cols  # ultra fallback
+        return pd.read_sql(
+            f"SELECT {', '.join(sel_cols)} FROM runs ORDER BY created_at DESC LIMIT 200",
+            con,
+        )
+
+
+@st.cache_data(show_spinner=False)
+def load_equity(run_id: int, version: int) -> pd.DataFrame:
+    # date-indexed and sorted, ready to chart
+    with closing(_ro_connect()) as con:
+        df = pd.read_sql(
+            "SELECT date, equity, cash FROM equity WHERE run_id = ? ORDER BY date",
+            con,
+            params=(run_id,),
+        )
+    return _index_by_date(df)
+
+
+@st.cache_data(show_spinner=False)
+def load_last_returns(run_id: int, version: int) -> pd.DataFrame:
+    with closing(_ro_connect()) as con:
+        return pd.read_sql(
+            "SELECT asset, ret FROM last_returns WHERE run_id = ? ORDER BY ret DESC",
+            con,
+            params=(run_id,),
+        )
+
+
+@st.cache_data(show_spinner=False)
+def load_trades(run_id: int, version: int) -> pd.DataFrame:
+    with closing(_ro_connect()) as con:
+        return pd.read_sql(
+            """
+            SELECT date, asset, side, qty, price, notional, fee_total
+            FROM trades
+            WHERE run_id = ?
+            ORDER BY date DESC
+            LIMIT 200
+            """,
+            con,
+            params=(run_id,),
+        )
+
+
 def format_money(x: float) -> str:
     return f"{x:,.2f}"
 
@@ -113,9 +221,8 @@ def format_money(x: float) -> str:
 st.set_page_config(page_title="market-lab", layout="wide")
 st.title("market-lab dashboard")
 
-con = sqlite3.connect(str(DB_PATH))
-con.execute("PRAGMA foreign_keys=ON;")
-init_min_schema(con)
+con = get_connection()
+version = db_version()
 
 # -----------------------------
 # Sidebar: runs
@@ -124,15 +231,7 @@ st.sidebar.subheader("Runs")
 
 runs_df = pd.DataFrame()
 try:
-    if table_exists(con, "runs"):
-        cols = columns(con, "runs")
-        sel_cols = [c for c in ["id", "asof_date", "created_at", "universe", "note", "report_dir"] if c in cols]
-        if "id" not in sel_cols:
-            sel_cols = ["rowid"] + sel_cols  # ultra fallback
-        runs_df = pd.read_sql(
-            f"SELECT {', '.join(sel_cols)} FROM runs ORDER BY created_at DESC LIMIT 200",
-            con,
-        )
+    runs_df = load_runs(version)
 except Exception as e:
     st.sidebar.error(f"Cannot read runs: {e}")
 
@@ -166,11 +265,7 @@ equity_df = pd.DataFrame()
 
 if table_exists(con, "equity"):
     try:
-        equity_df = pd.read_sql(
-            "SELECT date, equity, cash FROM equity WHERE run_id = ? ORDER BY date",
-            con,
-            params=(int(selected_run),),
-        )
+        equity_df = load_equity(int(selected_run), version)
     except Exception as e:
         st.error(f"Cannot read equity for run_id={selected_run}: {e}")
 
@@ -183,9 +278,11 @@ if equity_df.empty and table_exists(con, "baseline_equity"):
         # 2) date,equity,cash
         date_col = "asof_date" if "asof_date" in c else ("date" if "date" in c else None)
         if date_col and {"equity", "cash"}.issubset(c):
-            equity_df = pd.read_sql(
-                f"SELECT {date_col} AS date, equity, cash FROM baseline_equity ORDER BY date",
-                con,
+            equity_df = _index_by_date(
+                pd.read_sql(
+                    f"SELECT {date_col} AS date, equity, cash FROM baseline_equity ORDER BY date",
+                    con,
+                )
             )
     except Exception as e:
         st.warning(f"baseline_equity exists but can't be used: {e}")
@@ -198,20 +295,16 @@ if equity_df.empty:
     )
     st.stop()
 
-equity_df["date"] = pd.to_datetime(equity_df["date"], errors="coerce")
-equity_df = equity_df.dropna(subset=["date"]).sort_values("date").set_index("date")
-
 col1, col2, col3 = st.columns(3)
 col1.metric("Equity (last)", format_money(float(equity_df["equity"].iloc[-1])))
 col2.metric("Cash (last)", format_money(float(equity_df["cash"].iloc[-1])))
-dd = (equity_df["equity"] / equity_df["equity"].cummax() - 1.0).min()
-col3.metric("Max Drawdown", f"{dd*100:.2f}%")
+dd_arr = compute_drawdown(selected_run, version, equity_df["equity"].to_numpy(dtype=float))
+col3.metric("Max Drawdown", f"{dd_arr.min()*100:.2f}%")
 
 st.line_chart(equity_df["equity"])
 
 st.subheader("Drawdown")
-dd_series = equity_df["equity"] / equity_df["equity"].cummax() - 1.0
-st.area_chart(dd_series)
+st.area_chart(pd.Series(dd_arr, index=equity_df.index, name="equity"))
 
 last_date = equity_df.index.max().strftime("%Y-%m-%d")
 
@@ -222,11 +315,7 @@ st.subheader("Market daily moves (last day)")
 
 if table_exists(con, "last_returns"):
     try:
-        lr = pd.read_sql(
-            "SELECT asset, ret FROM last_returns WHERE run_id = ? ORDER BY ret DESC",
-            con,
-            params=(int(selected_run),),
-        )
+        lr = load_last_returns(int(selected_run), version)
         if lr.empty:
             st.info("No last_returns for this run yet.")
         else:
@@ -280,17 +369,7 @@ trades_df = pd.DataFrame()
 
 if table_exists(con, "trades"):
     try:
-        trades_df = pd.read_sql(
-            """
-            SELECT date, asset, side, qty, price, notional, fee_total
-            FROM trades
-            WHERE run_id = ?
-            ORDER BY date DESC
-            LIMIT 200
-            """,
-            con,
-            params=(int(selected_run),),
-        )
+        trades_df = load_trades(int(selected_run), version)
     except Exception as e:
         st.info(f"Trades not available: {e}")
 
@@ -316,5 +395,3 @@ if trades_df.empty:
     st.info("No trades found for this run.")
 else:
     st.dataframe(trades_df, use_container_width=True)
-
-con.close()
@@ -2,19 +2,32 @@
 from __future__ import annotations
 
 import argparse
+import sys
+from functools import reduce
 from pathlib import Path
 
 import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pacsv
 
+REPO = Path(__file__).resolve().parents[2]
+if str(REPO) not in sys.path:
+    sys.path.insert(0, str(REPO))
 
-def load_asset_csv(path: Path) -> pd.DataFrame:
-    df = pd.read_csv(path)
-    if "Date" not in df.columns or "close" not in df.columns:
-        raise ValueError(f"{path.name}: expected columns Date, close; got {list(df.columns)}")
-    df["Date"] = pd.to_datetime(df["Date"], errors="raise")
-    df = df.sort_values("Date")
-    df = df[["Date", "close"]].set_index("Date")
-    return df
+from engine.storage.frame_io import write_parquet_sibling  # noqa: E402
+
+
+def load_asset_table(path: Path, name: str) -> pa.Table:
+    # Date + close only, typed at read time; close is renamed to the asset name for the join
+    opts = pacsv.ConvertOptions(
+        include_columns=["Date", "close"],
+        column_types={"Date": pa.timestamp("ns"), "close": pa.float64()},
+    )
+    try:
+        table = pacsv.read_csv(path, convert_options=opts)
+    except (ValueError, KeyError) as e:  # ArrowInvalid / ArrowKeyError
+        raise ValueError(f"{path.name}: expected columns Date, close: {e}") from e
+    return table.rename_columns(["Date", name])
 
 
 def main() -> int:
@@ -32,27 +45,30 @@ def main() -> int:
     if not files:
         raise SystemExit(f"No CSV files found in {base}")
 
-    closes = []
-    names = []
-
-    for f in files:
-        name = f.stem.upper()
-        df = load_asset_csv(f).rename(columns={"close": name})
-        closes.append(df)
-        names.append(name)
+    names = [f.stem.upper() for f in files]
+    tables = [load_asset_table(f, name) for f, name in zip(files, names)]
 
-    panel_close = pd.concat(closes, axis=1, join="inner").sort_index()
+    # Arrow hash join on Date; only common dates survive, no union index is built
+    joined = reduce(lambda l, r: l.join(r, keys="Date", join_type="inner"), tables).sort_by("Date")
+    del tables
+    panel_close = joined.to_pandas(self_destruct=True, split_blocks=True).set_index("Date")
+    del joined
 
     # sanity: no gaps
     if panel_close.isna().any().any():
         bad = panel_close.isna().sum().to_dict()
         raise SystemExit(f"Panel has NaNs after inner-join: {bad}")
 
-    panel_returns = panel_close.pct_change().dropna()
+    # simple returns on the float64 block (panel is NaN-free)
+    arr = panel_close.to_numpy(dtype="float64", copy=False)
+    panel_returns = pd.DataFrame(arr[1:] / arr[:-1] - 1.0, index=panel_close.index[1:], columns=panel_close.columns)
 
     Path(args.out_close).parent.mkdir(parents=True, exist_ok=True)
-    panel_close.to_csv(args.out_close, index=True)
-    panel_returns.to_csv(args.out_returns, index=True)
+    # full repr precision: the CSV and its Parquet sibling must hold the same values
+    panel_close.to_csv(args.out_close, index=True, lineterminator="\n")
+    panel_returns.to_csv(args.out_returns, index=True, lineterminator="\n")
+    write_parquet_sibling(panel_close, Path(args.out_close))
+    write_parquet_sibling(panel_returns, Path(args.out_returns))
 
     print(f"OK: assets={names}")
     print(f"Saved close panel  -> {args.out_close} (rows={len(panel_close)})")
@@ -17,9 +17,18 @@ END = None  # do dnes
 DATA_DIR = Path("data/raw")
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+# jeden požadavek na všechny tickery; yfinance je stahuje souběžně
+tickers = list(ASSETS.values())
+print(f"Downloading {' '.join(tickers)}...")
+bulk = yf.download(tickers, start=START, end=END, auto_adjust=True, threads=True, progress=False)
+
 for name, ticker in ASSETS.items():
-    print(f"Downloading {ticker}...")
-    df = yf.download(ticker, start=START, end=END, auto_adjust=True)
+    # (Price, Ticker) columns, same layout as a single-ticker download;
+    # rows where only other tickers traded are dropped
+    if bulk.empty or ticker not in bulk.columns.get_level_values(1):
+        print(f"⚠️  No data for {ticker}")
+        continue
+    df = bulk.xs(ticker, axis=1, level=1, drop_level=False).dropna(how="all")
     if df.empty:
         print(f"⚠️  No data for {ticker}")
         continue
@@ -27,4 +36,3 @@ for name, ticker in ASSETS.items():
     out = DATA_DIR / f"{name}.csv"
     df.to_csv(out)
     print(f"Saved to {out}")
-
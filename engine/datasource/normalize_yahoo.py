@@ -9,12 +9,21 @@ Date, close, high, low, open, volume
 - Handles Yahoo/yfinance 2-row "Price/Ticker" headers
 - Drops the bogus "Ticker" row if present
 - Lowercases OHLCV column names
+
+With --arrow-stdout the normalized frames are written to stdout as Arrow IPC
+streams (one per asset, asset name in the schema metadata) instead of CSVs,
+so sanitize_ohlc.py --arrow-stdin can consume them through a pipe.
 """
 
 from __future__ import annotations
 
+import argparse
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import BinaryIO
+
 import pandas as pd
 
 
@@ -78,7 +87,8 @@ def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     df = df[df["Date"].astype(str).str.lower().ne("date")].copy()
 
     # Parse Date and drop rows that aren't valid dates
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    # ISO8601 covers both plain dates and Yahoo's timestamped exports without per-row format guessing
+    df["Date"] = pd.to_datetime(df["Date"], format="ISO8601", errors="coerce")
     df = df.dropna(subset=["Date"]).copy()
 
     # Now normalize OHLCV column names
@@ -126,21 +136,57 @@ def normalize_file(csv_path: Path) -> Path:
     return out_path
 
 
+def _normalize_frame(csv_path: Path) -> pd.DataFrame:
+    return _normalize_columns(_read_yahoo_csv(csv_path))
+
+
+def write_arrow_stream(df: pd.DataFrame, asset: str, sink: BinaryIO) -> None:
+    """Write one frame as a self-contained Arrow IPC stream tagged with its asset name."""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"asset": asset.encode()})
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
 def main() -> None:
+    ap = argparse.ArgumentParser(description="Normalize Yahoo CSVs from data/raw into data/processed.")
+    ap.add_argument(
+        "--arrow-stdout",
+        action="store_true",
+        help="Write normalized frames as Arrow IPC streams to stdout instead of CSVs (for piping into sanitize_ohlc.py)",
+    )
+    args = ap.parse_args()
+
+    # stdout carries data in --arrow-stdout mode, so progress goes to stderr
+    log = sys.stderr if args.arrow_stdout else sys.stdout
+
     if not RAW_DIR.exists():
         raise SystemExit(f"Missing folder: {RAW_DIR}")
 
-    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    if not args.arrow_stdout:
+        OUT_DIR.mkdir(parents=True, exist_ok=True)
 
     raw_files = sorted(RAW_DIR.glob("*.csv"))
     if not raw_files:
-        print("No CSV files found in data/raw")
+        print("No CSV files found in data/raw", file=log)
         return
 
-    for f in raw_files:
-        print(f"Processing {f.name}")
-        out = normalize_file(f)
-        print(f"Saved normalized to {out}")
+    # files are independent: normalize them in worker processes, results come back in input order
+    with ProcessPoolExecutor(max_workers=min(len(raw_files), os.cpu_count() or 1)) as ex:
+        if args.arrow_stdout:
+            # stdout is a single stream, so frames come back to this process for writing
+            for f, df in zip(raw_files, ex.map(_normalize_frame, raw_files)):
+                print(f"Processing {f.name}", file=log)
+                write_arrow_stream(df, f.stem, sys.stdout.buffer)
+        else:
+            for f, out in zip(raw_files, ex.map(normalize_file, raw_files)):
+                print(f"Processing {f.name}", file=log)
+                print(f"Saved normalized to {out}")
+
+    if args.arrow_stdout:
+        sys.stdout.buffer.flush()
 
 
 if __name__ == "__main__":
@@ -2,9 +2,23 @@
 from __future__ import annotations
 
 import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from itertools import repeat
 from pathlib import Path
+from typing import BinaryIO, Iterator
+
+import numpy as np
 import pandas as pd
 
+REPO = Path(__file__).resolve().parents[2]
+if str(REPO) not in sys.path:
+    sys.path.insert(0, str(REPO))
+
+from engine.storage.frame_io import write_frame  # noqa: E402
+
 
 def sanitize_df(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
     required = ["Date", "open", "high", "low", "close", "volume"]
@@ -21,71 +35,136 @@ def sanitize_df(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
     # Drop rows with broken numbers (rare, but be explicit)
     out = out.dropna(subset=["Date", "open", "high", "low", "close"])
 
-    # Compute invariants
-    row_max = out[["open", "close", "low"]].max(axis=1)
-    row_min = out[["open", "close", "high"]].min(axis=1)
+    # Compute invariants (plain ndarrays; the rows above are NaN-free in OHLC)
+    o = out["open"].to_numpy()
+    c = out["close"].to_numpy()
+    h = out["high"].to_numpy()
+    l = out["low"].to_numpy()
+    row_max = np.maximum(np.maximum(o, c), l)
+    row_min = np.minimum(np.minimum(o, c), h)
 
-    bad_high = out["high"] < row_max
-    bad_low = out["low"] > row_min
+    bad_high = h < row_max
+    bad_low = l > row_min
 
     changed = bad_high | bad_low
     changes = out.loc[changed, ["Date", "open", "high", "low", "close", "volume"]].copy()
     if not changes.empty:
         changes = changes.rename(columns={"high": "high_before", "low": "low_before"})
-        changes["row_max"] = row_max[changed].values
-        changes["row_min"] = row_min[changed].values
+        changes["row_max"] = row_max[changed]
+        changes["row_min"] = row_min[changed]
 
     # Clamp
-    out.loc[bad_high, "high"] = row_max[bad_high]
-    out.loc[bad_low, "low"] = row_min[bad_low]
+    high_after = np.where(bad_high, row_max, h)
+    low_after = np.where(bad_low, row_min, l)
+    out["high"] = high_after
+    out["low"] = low_after
 
     if not changes.empty:
-        changes["high_after"] = out.loc[changed, "high"].values
-        changes["low_after"] = out.loc[changed, "low"].values
-        changes["fixed_high"] = bad_high[changed].values
-        changes["fixed_low"] = bad_low[changed].values
+        changes["high_after"] = high_after[changed]
+        changes["low_after"] = low_after[changed]
+        changes["fixed_high"] = bad_high[changed]
+        changes["fixed_low"] = bad_low[changed]
 
     return out, changes
 
 
+def read_arrow_frames(source: BinaryIO) -> Iterator[tuple[str, pd.DataFrame]]:
+    """
+    Yield (file name, frame) from consecutive Arrow IPC streams,
+    as written by normalize_yahoo.py --arrow-stdout.
+    """
+    import pyarrow as pa
+
+    src = pa.PythonFile(source, mode="r")
+    while True:
+        try:
+            reader = pa.ipc.open_stream(src)
+        except pa.ArrowInvalid:
+            return  # end of input
+        table = reader.read_all()
+        asset = table.schema.metadata[b"asset"].decode()
+        yield f"{asset}.csv", table.to_pandas()
+
+
+def _write_sanitized(df: pd.DataFrame, target: Path, fmt: str) -> tuple[Path, pd.DataFrame]:
+    sanitized, changes = sanitize_df(df)
+    return write_frame(sanitized, target, fmt), changes
+
+
+def _sanitize_file(path: Path, target_dir: Path, fmt: str) -> tuple[str, Path, pd.DataFrame]:
+    # runs in a worker process: read, sanitize and write one file; only the change log goes back
+    return (path.name, *_write_sanitized(pd.read_csv(path, engine="pyarrow"), target_dir / path.name, fmt))
+
+
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--in-dir", default="data/processed")
     ap.add_argument("--out-dir", default="")
     ap.add_argument("--log", default="")
+    ap.add_argument(
+        "--arrow-stdin",
+        action="store_true",
+        help="Read frames as Arrow IPC streams from stdin (normalize_yahoo.py --arrow-stdout) instead of --in-dir",
+    )
+    ap.add_argument(
+        "--out-format",
+        choices=["csv", "parquet"],
+        default="csv",
+        help="Sanitized output format (parquet: zstd, <asset>.parquet; the sanitizer log stays CSV)",
+    )
     args = ap.parse_args()
 
     in_dir = Path(args.in_dir)
-    if not in_dir.exists():
-        print(f"ERROR: input dir not found: {in_dir}")
-        return 2
-
     out_dir = Path(args.out_dir) if args.out_dir else None
+
+    if args.arrow_stdin:
+        if out_dir is None:
+            print("ERROR: --out-dir is required with --arrow-stdin")
+            return 2
+    else:
+        if not in_dir.exists():
+            print(f"ERROR: input dir not found: {in_dir}")
+            return 2
+
+        files = sorted([p for p in in_dir.glob("*.csv") if not p.name.startswith("_")])
+        if not files:
+            print(f"ERROR: no CSV files in {in_dir}")
+            return 2
+
     if out_dir:
         out_dir.mkdir(parents=True, exist_ok=True)
-
-    files = sorted([p for p in in_dir.glob("*.csv") if not p.name.startswith("_")])
-    if not files:
-        print(f"ERROR: no CSV files in {in_dir}")
-        return 2
+    target_dir = out_dir or in_dir
 
     all_changes = []
     total_fixed_rows = 0
+    n_files = 0
+
+    with ExitStack() as stack:
+        if args.arrow_stdin:
+            # frames arrive through one pipe; sanitize them as they come
+            results = (
+                (name, *_write_sanitized(df, target_dir / name, args.out_format))
+                for name, df in read_arrow_frames(sys.stdin.buffer)
+            )
+        else:
+            # files are independent: one worker process per file, results in input order
+            ex = stack.enter_context(ProcessPoolExecutor(max_workers=min(len(files), os.cpu_count() or 1)))
+            results = ex.map(_sanitize_file, files, repeat(target_dir), repeat(args.out_format))
 
-    for f in files:
-        df = pd.read_csv(f)
-        sanitized, changes = sanitize_df(df)
+        for name, target, changes in results:
+            n_files += 1
 
-        if not changes.empty:
-            changes.insert(0, "asset", f.stem)
-            total_fixed_rows += len(changes)
-            all_changes.append(changes)
+            if not changes.empty:
+                changes.insert(0, "asset", Path(name).stem)
+                total_fixed_rows += len(changes)
+                all_changes.append(changes)
 
-        target = (out_dir / f.name) if out_dir else f
-        sanitized.to_csv(target, index=False)
+            status = "OK" if changes.empty else f"FIXED {len(changes)} row(s)"
+            print(f"{name}: {status} -> {target}")
 
-        status = "OK" if changes.empty else f"FIXED {len(changes)} row(s)"
-        print(f"{f.name}: {status} -> {target}")
+    if n_files == 0:
+        print("ERROR: no input frames on stdin")
+        return 2
 
     print(f"\nTotal fixed rows: {total_fixed_rows}")
 
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+# Max drawdown shared by baseline_portfolio, buyhold_portfolio and basic_stats.
+# NaN days are skipped (like pandas cummax/min); empty -> 0.0, all-NaN -> NaN.
+
+import numpy as np
+
+
+def _max_drawdown_numpy(c: np.ndarray) -> float:
+    # fmax ignores NaN in the running max, nanmin ignores the NaN ratios
+    return float(np.nanmin(c / np.fmax.accumulate(c) - 1.0))
+
+
+def max_drawdown(c: np.ndarray) -> float:
+    """Max drawdown (<= 0) of a positive price/equity path, as a fraction."""
+    c = np.ascontiguousarray(c, dtype=np.float64)
+    if c.size == 0:
+        return 0.0
+    if np.isnan(c).all():
+        return float("nan")
+    return _max_drawdown_numpy(c)
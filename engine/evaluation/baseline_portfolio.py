@@ -2,12 +2,25 @@
 from __future__ import annotations
 
 import argparse
+import sys
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List, Tuple
 
+import numpy as np
 import pandas as pd
 
+from _drawdown import max_drawdown  # sibling module
+
+REPO = Path(__file__).resolve().parents[2]
+if str(REPO) not in sys.path:
+    sys.path.insert(0, str(REPO))
+
+from engine.storage.frame_io import load_panel_close, write_frame  # noqa: E402
+
+
+TRADE_COLS = ("Date", "asset", "side", "qty", "price", "notional", "fee_var", "fee_fixed", "fee_total")
+
 
 @dataclass
 class Costs:
@@ -20,21 +33,70 @@ def bps_to_rate(bps: float) -> float:
     return bps / 10_000.0
 
 
-def load_panel_close(path: Path) -> pd.DataFrame:
-    df = pd.read_csv(path, parse_dates=["Date"])
-    df = df.sort_values("Date").set_index("Date")
-    for c in df.columns:
-        df[c] = pd.to_numeric(df[c], errors="coerce")
-    if df.isna().any().any():
-        bad = df.isna().sum().to_dict()
-        raise ValueError(f"panel_close contains NaNs: {bad}")
-    return df
+def month_start_mask(index: pd.DatetimeIndex) -> np.ndarray:
+    # True on the first row of each (year, month) in a sorted index
+    codes = index.year.to_numpy() * 12 + index.month.to_numpy()
+    mask = np.empty(len(codes), dtype=bool)
+    if len(codes):
+        mask[0] = True
+        np.not_equal(codes[1:], codes[:-1], out=mask[1:])
+    return mask
+
+
+def iso_dates(index: pd.DatetimeIndex) -> np.ndarray:
+    # YYYY-MM-DD strings in one vectorized call (DatetimeIndex.strftime formats element by element)
+    return np.datetime_as_string(index.to_numpy().astype("datetime64[D]"), unit="D")
 
 
 def first_trading_day_each_month(index: pd.DatetimeIndex) -> pd.DatetimeIndex:
-    s = pd.Series(index=index, data=1)
-    first = s.groupby([index.year, index.month]).head(1).index
-    return pd.DatetimeIndex(first)
+    return index[month_start_mask(index)]
+
+
+def _equity_frame(
+    dates: np.ndarray,
+    assets: List[str],
+    P: np.ndarray,
+    cash: np.ndarray,
+    qty: np.ndarray,
+) -> pd.DataFrame:
+    # per-day columns: Date, equity, cash, then qty_/val_ pairs per asset;
+    # the mark-to-market is one row-sum over the position values
+    val = qty * P
+    eq = val.sum(axis=1) + cash
+    cols: Dict[str, object] = {"Date": dates, "equity": eq, "cash": cash}
+    for j, a in enumerate(assets):
+        cols[f"qty_{a}"] = qty[:, j]
+        cols[f"val_{a}"] = val[:, j]
+    return pd.DataFrame(cols)
+
+
+def _trades_frame(
+    dates: np.ndarray,
+    assets: List[str],
+    costs: Costs,
+    t_day: np.ndarray,
+    t_asset: np.ndarray,
+    t_side: np.ndarray,
+    t_qty: np.ndarray,
+    t_price: np.ndarray,
+    t_notional: np.ndarray,
+    t_fee_var: np.ndarray,
+    t_fee_total: np.ndarray,
+) -> pd.DataFrame:
+    # trades arrive as parallel arrays (side: -1 SELL / +1 BUY); columns are already typed,
+    # so the frame is assembled without inference (and keeps its header when there are no trades)
+    cols = dict(zip(TRADE_COLS, (
+        dates[t_day],
+        np.asarray(assets, dtype=object)[t_asset],
+        np.where(t_side < 0, "SELL", "BUY"),
+        t_qty,
+        t_price,
+        t_notional,
+        t_fee_var,
+        np.full(len(t_day), float(costs.fixed_per_trade)),
+        t_fee_total,
+    )))
+    return pd.DataFrame(cols, columns=list(TRADE_COLS))
 
 
 def simulate_equal_weight_monthly_rebalance(
@@ -44,117 +106,149 @@ def simulate_equal_weight_monthly_rebalance(
 ) -> Tuple[pd.DataFrame, pd.DataFrame]:
     assets = list(close.columns)
     n = len(assets)
-    target_w = {a: 1.0 / n for a in assets}
+    target_w = 1.0 / n
 
-    rebalance_days = set(first_trading_day_each_month(close.index))
+    # float64 price matrix [days, assets]; per-day work is a dot product, rebalances touch the rows
+    P = close.to_numpy(dtype=np.float64)
+    dates = iso_dates(close.index)
+    rb_mask = month_start_mask(close.index)
 
+    T = len(P)
     cash = initial_cash
-    qty: Dict[str, float] = {a: 0.0 for a in assets}
-
-    equity_rows: List[Dict[str, float]] = []
-    trade_rows: List[Dict[str, object]] = []
+    qty = np.zeros(n)
+
+    # struct-of-arrays output, filled in place
+    cash_arr = np.empty(T)
+    qty_arr = np.empty((T, n))
+
+    # trades buffer: at most one order per asset per rebalance day; k is the write cursor
+    cap = n * int(rb_mask.sum())
+    t_day = np.empty(cap, dtype=np.int64)
+    t_asset = np.empty(cap, dtype=np.int64)
+    t_side = np.empty(cap, dtype=np.int8)
+    t_qty = np.empty(cap)
+    t_price = np.empty(cap)
+    t_notional = np.empty(cap)
+    t_fee_var = np.empty(cap)
+    k = 0
 
     fee_rate = bps_to_rate(costs.fee_bps)
     slip_rate = bps_to_rate(costs.slippage_bps)
-
-    def portfolio_value(prices_row: pd.Series) -> float:
-        return cash + sum(qty[a] * float(prices_row[a]) for a in assets)
-
-    for dt, prices in close.iterrows():
-        prices = prices.astype(float)
-
-        pv_before = portfolio_value(prices)
-
-        if dt in rebalance_days:
-            pv = pv_before
-            target_val = {a: pv * target_w[a] for a in assets}
-            current_val = {a: qty[a] * prices[a] for a in assets}
-            delta_val = {a: target_val[a] - current_val[a] for a in assets}
-
-            for side in ("SELL", "BUY"):
-                for a in assets:
-                    dv = delta_val[a]
-
-                    if side == "SELL" and dv < 0:
-                        notional = abs(dv)
-                        if notional <= 0:
-                            continue
-                        exec_price = prices[a] * (1.0 - slip_rate)
-                        dq = notional / exec_price
-                        dq = min(dq, qty[a])
-                        notional_exec = dq * exec_price
-
-                        var_cost = notional_exec * fee_rate
-                        fix_cost = costs.fixed_per_trade
-                        total_cost = var_cost + fix_cost
-
-                        cash += notional_exec - total_cost
-                        qty[a] -= dq
-
-                        trade_rows.append({
-                            "Date": dt.strftime("%Y-%m-%d"),
-                            "asset": a,
-                            "side": "SELL",
-                            "qty": dq,
-                            "price": exec_price,
-                            "notional": notional_exec,
-                            "fee_var": var_cost,
-                            "fee_fixed": fix_cost,
-                            "fee_total": total_cost,
-                        })
-
-                    if side == "BUY" and dv > 0:
-                        notional = dv
-                        if notional <= 0:
-                            continue
-                        exec_price = prices[a] * (1.0 + slip_rate)
-
-                        max_notional_exec = max(0.0, (cash - costs.fixed_per_trade) / (1.0 + fee_rate))
-                        notional_exec = min(notional, max_notional_exec)
-                        if notional_exec <= 0:
-                            continue
-
-                        dq = notional_exec / exec_price
-                        var_cost = notional_exec * fee_rate
-                        fix_cost = costs.fixed_per_trade
-                        total_cost = var_cost + fix_cost
-
-                        cash -= (notional_exec + total_cost)
-                        qty[a] += dq
-
-                        trade_rows.append({
-                            "Date": dt.strftime("%Y-%m-%d"),
-                            "asset": a,
-                            "side": "BUY",
-                            "qty": dq,
-                            "price": exec_price,
-                            "notional": notional_exec,
-                            "fee_var": var_cost,
-                            "fee_fixed": fix_cost,
-                            "fee_total": total_cost,
-                        })
-
-        pv_after = portfolio_value(prices)
-
-        row = {"Date": dt.strftime("%Y-%m-%d"), "equity": pv_after, "cash": cash}
-        for a in assets:
-            row[f"qty_{a}"] = qty[a]
-            row[f"val_{a}"] = qty[a] * prices[a]
-        equity_rows.append(row)
-
-    equity = pd.DataFrame(equity_rows)
-    trades = pd.DataFrame(trade_rows)
+    fix_cost = costs.fixed_per_trade
+
+    # positions only change on rebalance days: visit those, and carry cash/qty
+    # forward over the days until the next one (before the first: all cash)
+    cash_arr.fill(initial_cash)
+    qty_arr.fill(0.0)
+    rb_idx = np.flatnonzero(rb_mask)
+    for i, end in zip(rb_idx.tolist(), np.append(rb_idx[1:], T).tolist()):
+        prices = P[i]
+
+        pv = prices @ qty + cash
+        delta_val = pv * target_w - qty * prices
+
+        # SELL leg: independent of cash, so all sells are priced at once
+        sell = np.flatnonzero(delta_val < 0)
+        if len(sell):
+            exec_price = prices[sell] * (1.0 - slip_rate)
+            dq = np.minimum(-delta_val[sell] / exec_price, qty[sell])
+            notional_exec = dq * exec_price
+            var_cost = notional_exec * fee_rate
+            # sequential fold keeps the original per-trade cash arithmetic
+            cash = float(np.add.accumulate(np.concatenate(([cash], notional_exec - (var_cost + fix_cost))))[-1])
+            qty[sell] -= dq
+
+            m = k + len(sell)
+            t_day[k:m] = i
+            t_asset[k:m] = sell
+            t_side[k:m] = -1
+            t_qty[k:m] = dq
+            t_price[k:m] = exec_price
+            t_notional[k:m] = notional_exec
+            t_fee_var[k:m] = var_cost
+            k = m
+
+        # BUY leg: each order is capped by the cash left after the previous one.
+        # Orders are filled in full (vectorized) up to the first one the cap would bind;
+        # from there on the scalar loop applies the cap order by order.
+        buy = np.flatnonzero(delta_val > 0)
+        dv = delta_val[buy]
+        cost = dv + dv * fee_rate + fix_cost
+        cash_acc = np.add.accumulate(np.concatenate(([cash], -cost)))
+        fits = dv <= np.maximum(0.0, (cash_acc[:-1] - fix_cost) / (1.0 + fee_rate))
+        m = len(buy) if fits.all() else int(np.argmin(fits))
+        if m:
+            exec_price = prices[buy[:m]] * (1.0 + slip_rate)
+            dq = dv[:m] / exec_price
+            cash = float(cash_acc[m])
+            qty[buy[:m]] += dq
+
+            e = k + m
+            t_day[k:e] = i
+            t_asset[k:e] = buy[:m]
+            t_side[k:e] = 1
+            t_qty[k:e] = dq
+            t_price[k:e] = exec_price
+            t_notional[k:e] = dv[:m]
+            t_fee_var[k:e] = dv[:m] * fee_rate
+            k = e
+
+        # plain floats for the remaining scalar orders
+        price_l = prices.tolist()
+        delta_l = delta_val.tolist()
+        for j in buy[m:].tolist():
+            exec_price = price_l[j] * (1.0 + slip_rate)
+
+            max_notional_exec = max(0.0, (cash - fix_cost) / (1.0 + fee_rate))
+            notional_exec = min(delta_l[j], max_notional_exec)
+            if notional_exec <= 0:
+                continue
+
+            dq = notional_exec / exec_price
+            var_cost = notional_exec * fee_rate
+
+            cash -= (notional_exec + var_cost + fix_cost)
+            qty[j] += dq
+
+            t_day[k] = i
+            t_asset[k] = j
+            t_side[k] = 1
+            t_qty[k] = dq
+            t_price[k] = exec_price
+            t_notional[k] = notional_exec
+            t_fee_var[k] = var_cost
+            k += 1
+
+        cash_arr[i:end] = cash
+        qty_arr[i:end] = qty
+
+    equity = _equity_frame(dates, assets, P, cash_arr, qty_arr)
+    trades = _trades_frame(
+        dates,
+        assets,
+        costs,
+        t_day[:k],
+        t_asset[:k],
+        t_side[:k],
+        t_qty[:k],
+        t_price[:k],
+        t_notional[:k],
+        t_fee_var[:k],
+        t_fee_var[:k] + fix_cost,
+    )
     return equity, trades
 
 
 def summarize_equity(equity: pd.DataFrame) -> Dict[str, float]:
-    eq = equity["equity"].astype(float)
+    eq = equity["equity"]  # float64 straight from the simulator
     rets = eq.pct_change().dropna()
 
-    years = (pd.to_datetime(equity["Date"].iloc[-1]) - pd.to_datetime(equity["Date"].iloc[0])).days / 365.25
+    # only the two endpoints are parsed, in one call with the known format
+    first, last = pd.to_datetime(equity["Date"].iloc[[0, -1]], format="%Y-%m-%d")
+    years = (last - first).days / 365.25
     cagr = (eq.iloc[-1] / eq.iloc[0]) ** (1.0 / years) - 1.0 if years > 0 else 0.0
     vol = rets.std() * (252 ** 0.5)
-    dd = (eq / eq.cummax() - 1.0).min()
+    dd = max_drawdown(eq.to_numpy())
 
     return {
         "start_equity": float(eq.iloc[0]),
@@ -176,6 +270,12 @@ def main() -> int:
     ap.add_argument("--fixed", type=float, default=0.0, help="Fixed cost per trade/order")
     ap.add_argument("--out-equity", default="data/processed_sanitized/baseline_equity.csv", help="Equity curve output CSV")
     ap.add_argument("--out-trades", default="data/processed_sanitized/baseline_trades.csv", help="Trades output CSV")
+    ap.add_argument(
+        "--out-format",
+        choices=["csv", "parquet"],
+        default="csv",
+        help="Output format (parquet: zstd, written next to --out-* with a .parquet suffix)",
+    )
     args = ap.parse_args()
 
     close = load_panel_close(Path(args.panel))
@@ -184,8 +284,8 @@ def main() -> int:
     equity, trades = simulate_equal_weight_monthly_rebalance(close, args.initial, costs)
 
     Path(args.out_equity).parent.mkdir(parents=True, exist_ok=True)
-    equity.to_csv(args.out_equity, index=False)
-    trades.to_csv(args.out_trades, index=False)
+    out_equity = write_frame(equity, Path(args.out_equity), args.out_format)
+    out_trades = write_frame(trades, Path(args.out_trades), args.out_format)
 
     s = summarize_equity(equity)
     print("BASELINE (equal-weight, monthly rebalance)")
@@ -193,8 +293,8 @@ def main() -> int:
     print(f"costs: fee_bps={args.fee_bps} slippage_bps={args.slippage_bps} fixed={args.fixed}")
     print(f"start={s['start_equity']:.2f} end={s['end_equity']:.2f} years={s['years']:.2f}")
     print(f"CAGR={s['CAGR_pct']:.2f}%  Vol={s['Volatility_pct']:.2f}%  MaxDD={s['MaxDrawdown_pct']:.2f}%")
-    print(f"saved: {args.out_equity}")
-    print(f"saved: {args.out_trades}")
+    print(f"saved: {out_equity}")
+    print(f"saved: {out_trades}")
     return 0
 
 
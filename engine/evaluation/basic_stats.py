@@ -1,47 +1,99 @@
+import argparse
+import json
+import sys
 import pandas as pd
 from pathlib import Path
 import numpy as np
 
-DATA_DIR = Path("data/processed")
+from _drawdown import max_drawdown
 
-results = []
+REPO = Path(__file__).resolve().parents[2]
+if str(REPO) not in sys.path:
+    sys.path.insert(0, str(REPO))
 
-for csv_file in DATA_DIR.glob("*.csv"):
-    symbol = csv_file.stem
+from engine.storage.frame_io import file_digest  # noqa: E402
 
-    df = pd.read_csv(csv_file)
+# bump whenever the metrics computation changes: an older cache is then dropped as a whole
+CACHE_VERSION = 2
 
-    # NORMALIZACE HLAVIČEK (kritické!)
-    df.columns = [c.strip().lower() for c in df.columns]
 
-    # kontrola
-    if "date" not in df.columns:
-        raise ValueError(f"{symbol}: missing 'date' column, columns={df.columns}")
+def main() -> int:
+    ap = argparse.ArgumentParser(description="CAGR / volatility / max drawdown per asset CSV.")
+    ap.add_argument("--dir", default="data/processed", help="Directory with per-asset CSVs (default: data/processed)")
+    ap.add_argument("--force", action="store_true", help="Ignore the per-file cache and recompute every asset")
+    args = ap.parse_args()
 
-    df["date"] = pd.to_datetime(df["date"])
-    df = df.set_index("date")
+    data_dir = Path(args.dir)
+    cache_path = data_dir / "_basic_stats_cache.json"
 
-    # denní výnosy
-    df["ret"] = df["close"].pct_change()
+    # výsledky podle souboru; soubor se přepočítá jen když se změnil jeho obsah
+    cache = {}
+    if not args.force and cache_path.exists():
+        try:
+            data = json.loads(cache_path.read_text(encoding="utf-8"))
+        except ValueError:
+            data = {}
+        if isinstance(data, dict) and data.get("version") == CACHE_VERSION:
+            cache = data.get("files", {})
+    fresh_cache = {}
 
-    days = len(df)
-    years = days / 252
+    results = []
 
-    cagr = (df["close"].iloc[-1] / df["close"].iloc[0]) ** (1 / years) - 1
-    vol = df["ret"].std() * np.sqrt(252)
+    for csv_file in data_dir.glob("*.csv"):
+        # pomocné/odvozené soubory (log, panely, výstupy portfolií) nejsou aktiva
+        if csv_file.name.startswith(("_", "panel_", "baseline_", "buyhold_")) or "log" in csv_file.name.lower():
+            continue
 
-    equity = (1 + df["ret"]).cumprod()
-    dd = equity / equity.cummax() - 1
-    max_dd = dd.min()
+        symbol = csv_file.stem
 
-    results.append({
-        "asset": symbol,
-        "CAGR": round(cagr * 100, 2),
-        "Volatility": round(vol * 100, 2),
-        "MaxDrawdown": round(max_dd * 100, 2),
-        "Years": round(years, 1),
-    })
+        digest = file_digest(csv_file)
+        hit = cache.get(csv_file.name)
+        if hit is not None and hit.get("digest") == digest:
+            results.append(hit["row"])
+            fresh_cache[csv_file.name] = hit
+            continue
 
-summary = pd.DataFrame(results).sort_values("CAGR", ascending=False)
-print(summary)
+        # jen date + close; ostatní sloupce se neparsují
+        header = pd.read_csv(csv_file, nrows=0).columns
+        df = pd.read_csv(csv_file, engine="pyarrow", usecols=[c for c in header if c.strip().lower() in ("date", "close")])
 
+        # NORMALIZACE HLAVIČEK (kritické!)
+        df.columns = [c.strip().lower() for c in df.columns]
+
+        # kontrola
+        if "date" not in df.columns:
+            raise ValueError(f"{symbol}: missing 'date' column, columns={df.columns}")
+
+        c = df["close"].to_numpy(dtype=np.float64)
+
+        days = len(c)
+        years = days / 252
+
+        cagr = (c[-1] / c[0]) ** (1 / years) - 1
+
+        # denní výnosy
+        ret = c[1:] / c[:-1] - 1.0
+        vol = ret.std(ddof=1) * np.sqrt(252)
+
+        # drawdown z equity složené z výnosů (od 2. dne, den 0 nemá výnos) - stejná definice jako dřív
+        max_dd = max_drawdown(np.cumprod(1.0 + ret))
+
+        row = {
+            "asset": symbol,
+            "CAGR": float(round(cagr * 100, 2)),
+            "Volatility": float(round(vol * 100, 2)),
+            "MaxDrawdown": float(round(max_dd * 100, 2)),
+            "Years": round(years, 1),
+        }
+        results.append(row)
+        fresh_cache[csv_file.name] = {"digest": digest, "row": row}
+
+    cache_path.write_text(json.dumps({"version": CACHE_VERSION, "files": fresh_cache}, indent=2), encoding="utf-8")
+
+    summary = pd.DataFrame(results).sort_values("CAGR", ascending=False)
+    print(summary)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
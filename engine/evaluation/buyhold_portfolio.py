@@ -2,12 +2,22 @@
 from __future__ import annotations
 
 import argparse
+import sys
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List, Tuple
 
+import numpy as np
 import pandas as pd
 
+from _drawdown import max_drawdown  # sibling module
+
+REPO = Path(__file__).resolve().parents[2]
+if str(REPO) not in sys.path:
+    sys.path.insert(0, str(REPO))
+
+from engine.storage.frame_io import load_panel_close  # noqa: E402
+
 
 @dataclass
 class Costs:
@@ -20,25 +30,16 @@ def bps_to_rate(bps: float) -> float:
     return bps / 10_000.0
 
 
-def load_panel_close(path: Path) -> pd.DataFrame:
-    df = pd.read_csv(path, parse_dates=["Date"])
-    df = df.sort_values("Date").set_index("Date")
-    for c in df.columns:
-        df[c] = pd.to_numeric(df[c], errors="coerce")
-    if df.isna().any().any():
-        bad = df.isna().sum().to_dict()
-        raise ValueError(f"panel_close contains NaNs: {bad}")
-    return df
-
-
 def summarize_equity(equity: pd.DataFrame) -> Dict[str, float]:
-    eq = equity["equity"].astype(float)
+    eq = equity["equity"]  # float64 straight from the simulator
     rets = eq.pct_change().dropna()
 
-    years = (pd.to_datetime(equity["Date"].iloc[-1]) - pd.to_datetime(equity["Date"].iloc[0])).days / 365.25
+    # only the two endpoints are parsed, in one call with the known format
+    first, last = pd.to_datetime(equity["Date"].iloc[[0, -1]], format="%Y-%m-%d")
+    years = (last - first).days / 365.25
     cagr = (eq.iloc[-1] / eq.iloc[0]) ** (1.0 / years) - 1.0 if years > 0 else 0.0
     vol = rets.std() * (252 ** 0.5)
-    dd = (eq / eq.cummax() - 1.0).min()
+    dd = max_drawdown(eq.to_numpy())
 
     return {
         "start_equity": float(eq.iloc[0]),
@@ -64,18 +65,20 @@ def simulate_buyhold_equal_weight(
     slip_rate = bps_to_rate(costs.slippage_bps)
 
     cash = float(initial_cash)
-    qty: Dict[str, float] = {a: 0.0 for a in assets}
+    # positions aligned with `assets` (column order of the panel)
+    qty_vec = np.zeros(n, dtype=np.float64)
     trade_rows: List[Dict[str, object]] = []
-    equity_rows: List[Dict[str, float]] = []
 
     # --- single entry on first date ---
     first_dt = close.index[0]
-    first_prices = close.loc[first_dt].astype(float)
+    # [T, N] float64 prices; the entry loop reads the first row as plain floats
+    P = close.to_numpy(dtype=np.float64, copy=False)
+    first_prices = P[0].tolist()
 
     # buy sequentially with cash constraint (cash-friendly)
-    for a in assets:
+    for j, a in enumerate(assets):
         target_notional = initial_cash * w
-        exec_price = float(first_prices[a]) * (1.0 + slip_rate)
+        exec_price = first_prices[j] * (1.0 + slip_rate)
 
         max_notional_exec = max(0.0, (cash - costs.fixed_per_trade) / (1.0 + fee_rate))
         notional_exec = min(target_notional, max_notional_exec)
@@ -88,7 +91,7 @@ def simulate_buyhold_equal_weight(
         total_cost = var_cost + fix_cost
 
         cash -= (notional_exec + total_cost)
-        qty[a] += dq
+        qty_vec[j] += dq
 
         trade_rows.append({
             "Date": first_dt.strftime("%Y-%m-%d"),
@@ -102,20 +105,20 @@ def simulate_buyhold_equal_weight(
             "fee_total": total_cost,
         })
 
-    def portfolio_value(prices_row: pd.Series) -> float:
-        return cash + sum(qty[a] * float(prices_row[a]) for a in assets)
-
-    for dt, prices in close.iterrows():
-        prices = prices.astype(float)
-        pv = portfolio_value(prices)
+    # positions are fixed after the entry: mark the whole curve to market at once
+    vals = P * qty_vec[None, :]
 
-        row = {"Date": dt.strftime("%Y-%m-%d"), "equity": pv, "cash": cash}
-        for a in assets:
-            row[f"qty_{a}"] = qty[a]
-            row[f"val_{a}"] = qty[a] * float(prices[a])
-        equity_rows.append(row)
+    cols: Dict[str, object] = {
+        "Date": close.index.strftime("%Y-%m-%d"),
+        # one GEMV over the whole [T, N] block instead of a row-wise reduction
+        "equity": P @ qty_vec + cash,
+        "cash": cash,
+    }
+    for j, a in enumerate(assets):
+        cols[f"qty_{a}"] = qty_vec[j]
+        cols[f"val_{a}"] = vals[:, j]
 
-    return pd.DataFrame(equity_rows), pd.DataFrame(trade_rows)
+    return pd.DataFrame(cols), pd.DataFrame(trade_rows)
 
 
 def main() -> int:
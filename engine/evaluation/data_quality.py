@@ -20,15 +20,29 @@ Checks:
 from __future__ import annotations
 
 import argparse
+import json
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 from typing import Dict, List, Tuple
 
+import numpy as np
 import pandas as pd
 
+REPO = Path(__file__).resolve().parents[2]
+if str(REPO) not in sys.path:
+    sys.path.insert(0, str(REPO))
+
+from engine.storage.frame_io import file_digest  # noqa: E402
+
 
 REQUIRED = ["Date", "open", "high", "low", "close", "volume"]
 
+# bump whenever check_file's checks or result fields change: older caches are then ignored
+CACHE_VERSION = 1
+
 
 def _normalize_columns(cols: List[str]) -> Dict[str, str]:
     """
@@ -46,7 +60,8 @@ def _normalize_columns(cols: List[str]) -> Dict[str, str]:
 
 def _read_csv(path: Path) -> pd.DataFrame:
     # do not set index_col here; we want to validate Date first
-    return pd.read_csv(path)
+    # (Arrow's multithreaded parser; columns it cannot type stay strings and are coerced below)
+    return pd.read_csv(path, engine="pyarrow")
 
 
 def _load_spy_calendar(base_dir: Path) -> pd.DatetimeIndex:
@@ -54,12 +69,12 @@ def _load_spy_calendar(base_dir: Path) -> pd.DatetimeIndex:
     if not spy.exists():
         raise FileNotFoundError(f"SPY.csv not found in {base_dir} (needed for --calendar spy)")
 
-    df = pd.read_csv(spy)
+    df = pd.read_csv(spy, engine="pyarrow")
     cols = {c.strip().lower(): c for c in df.columns}
     if "date" not in cols:
         raise ValueError(f"SPY.csv missing Date column, columns={list(df.columns)}")
 
-    dates = pd.to_datetime(df[cols["date"]], errors="coerce")
+    dates = pd.to_datetime(df[cols["date"]], format="%Y-%m-%d", errors="coerce")
     dates = dates.dropna().drop_duplicates().sort_values()
     return pd.DatetimeIndex(dates)
 
@@ -68,9 +83,22 @@ def _missing_against_expected(
     dates: pd.Series,
     expected: pd.DatetimeIndex,
 ) -> Tuple[int, int, pd.DatetimeIndex]:
-    present = pd.DatetimeIndex(dates.dropna().unique()).sort_values()
-    missing = expected.difference(present)
-    return len(expected), len(present), missing
+    # both sides as sorted unique int64 nanoseconds: the difference is a NumPy sorted merge
+    present_i8 = np.unique(dates.dropna().to_numpy().astype("datetime64[ns]").view(np.int64))
+    expected_i8 = expected.to_numpy().astype("datetime64[ns]").view(np.int64)
+    missing_i8 = np.setdiff1d(expected_i8, present_i8, assume_unique=True)
+    return len(expected), len(present_i8), pd.DatetimeIndex(missing_i8.view("datetime64[ns]"))
+
+
+def _load_cache(cache_path: Path, params: Dict[str, object]) -> Dict[str, Dict[str, object]]:
+    """Cached check_file results per file name; empty when missing, unreadable or built with other params."""
+    try:
+        data = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("params") != params:
+        return {}
+    return data.get("files", {})
 
 
 def check_file(
@@ -102,8 +130,8 @@ def check_file(
     # Rename to canonical columns for consistent checks
     df = df.rename(columns={colmap[k]: k for k in colmap})
 
-    # Parse Date
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce", utc=False)
+    # Parse Date (normalized files are YYYY-MM-DD; an explicit format skips per-row inference)
+    df["Date"] = pd.to_datetime(df["Date"], format="%Y-%m-%d", errors="coerce", utc=False)
     bad_dates = int(df["Date"].isna().sum())
     if bad_dates:
         result["ok"] = False
@@ -130,26 +158,31 @@ def check_file(
     for c in ["open", "high", "low", "close", "volume"]:
         df[c] = pd.to_numeric(df[c], errors="coerce")
 
-    nan_after = df[["open", "high", "low", "close", "volume"]].isna().sum()
-    nan_after_total = int(nan_after.sum())
-    if nan_after_total:
+    # one float64 block [rows, open/high/low/close/volume]; all value checks below read it
+    X = df[["open", "high", "low", "close", "volume"]].to_numpy(dtype=np.float64)
+    o, h, l, c, v = X.T
+
+    nan_after = np.isnan(X).sum(axis=0)
+    if nan_after.any():
         result["ok"] = False
-        result["errors"].append(f"non-numeric values coerced to NaN in OHLCV: {nan_after.to_dict()}")
+        counts = dict(zip(["open", "high", "low", "close", "volume"], nan_after.tolist()))
+        result["errors"].append(f"non-numeric values coerced to NaN in OHLCV: {counts}")
 
     # OHLC sanity
-    for c in ["open", "high", "low", "close"]:
-        nonpos = int((df[c] <= 0).sum())
+    nonpos_counts = (X[:, :4] <= 0).sum(axis=0).tolist()
+    for col, nonpos in zip(["open", "high", "low", "close"], nonpos_counts):
         if nonpos:
             result["ok"] = False
-            result["errors"].append(f"{c}: non-positive values: {nonpos}")
+            result["errors"].append(f"{col}: non-positive values: {nonpos}")
 
-    vol_neg = int((df["volume"] < 0).sum())
+    vol_neg = int(np.count_nonzero(v < 0))
     if vol_neg:
         result["ok"] = False
         result["errors"].append(f"volume: negative values: {vol_neg}")
 
-    bad_high = int((df["high"] < df[["open", "close", "low"]].max(axis=1)).sum())
-    bad_low = int((df["low"] > df[["open", "close", "high"]].min(axis=1)).sum())
+    # fmax/fmin skip NaN like DataFrame.max/min(axis=1)
+    bad_high = int(np.count_nonzero(h < np.fmax(np.fmax(o, c), l)))
+    bad_low = int(np.count_nonzero(l > np.fmin(np.fmin(o, c), h)))
     if bad_high:
         result["ok"] = False
         result["errors"].append(f"high < max(open,close,low): {bad_high}")
@@ -162,9 +195,10 @@ def check_file(
         expected = pd.date_range(df["Date"].min(), df["Date"].max(), freq="B")  # Mon-Fri
         cal_label = "Mon-Fri calendar (includes market holidays)"
     else:
-        expected = expected_calendar[
-            (expected_calendar >= df["Date"].min()) & (expected_calendar <= df["Date"].max())
-        ]
+        # calendar is sorted: bisect the [min, max] window instead of two full comparisons
+        lo = expected_calendar.searchsorted(df["Date"].min(), side="left")
+        hi = expected_calendar.searchsorted(df["Date"].max(), side="right")
+        expected = expected_calendar[lo:hi]
         cal_label = "SPY calendar"
 
     expected_n, present_n, missing = _missing_against_expected(df["Date"], expected)
@@ -218,6 +252,11 @@ def main() -> int:
         default="business",
         help="Expected trading days calendar: business=Mon-Fri, spy=use SPY dates as master calendar (default: business)",
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-check every file; ignore results cached for unchanged files (same content).",
+    )
 
     args = parser.parse_args()
 
@@ -253,13 +292,34 @@ def main() -> int:
 
     print(f"Scanning {len(files)} file(s) in {base}...\n")
 
-    for f in files:
-        r = check_file(
-            f,
-            max_missing_days_to_list=args.max_missing_list,
-            expected_calendar=spy_calendar,
-        )
+    # unchanged files (same content, same options and SPY calendar file) reuse the last result
+    cache_path = base / "_data_quality_cache.json"
+    params: Dict[str, object] = {
+        "version": CACHE_VERSION,
+        "calendar": args.calendar,
+        "max_missing_list": args.max_missing_list,
+        "spy": file_digest(base / "SPY.csv") if spy_calendar is not None else None,
+    }
+    cached = {} if args.force else _load_cache(cache_path, params)
+    digests = {f.name: file_digest(f) for f in files}
+    results_by_name = {
+        f.name: cached[f.name]["result"]
+        for f in files
+        if f.name in cached and cached[f.name].get("digest") == digests[f.name]
+    }
+    todo = [f for f in files if f.name not in results_by_name]
+
+    if todo:
+        # files are independent: one worker process per file, results in input order
+        with ProcessPoolExecutor(max_workers=min(len(todo), os.cpu_count() or 1)) as ex:
+            fresh = ex.map(check_file, todo, repeat(args.max_missing_list), repeat(spy_calendar))
+            results_by_name.update((f.name, r) for f, r in zip(todo, fresh))
+
+    results = [results_by_name[f.name] for f in files]
+    entries = {f.name: {"digest": digests[f.name], "result": r} for f, r in zip(files, results)}
+    cache_path.write_text(json.dumps({"params": params, "files": entries}, indent=2), encoding="utf-8")
 
+    for f, r in zip(files, results):
         ok = r["ok"]
         errs = r["errors"]
         warns = r["warnings"]
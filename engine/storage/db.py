@@ -64,6 +64,9 @@ SCHEMA = [
     );""",
 ]
 
+# one script, one transaction: the schema is created completely or not at all
+SCHEMA_SQL = "\n".join(["BEGIN;", *SCHEMA, "COMMIT;"])
+
 
 def init_db(db_path: str | Path) -> None:
     db_path = Path(db_path)
@@ -72,9 +75,6 @@ def init_db(db_path: str | Path) -> None:
     # Opening a connection will create the file if missing (non-zero size after schema)
     con = sqlite3.connect(db_path)
     try:
-        cur = con.cursor()
-        for stmt in SCHEMA:
-            cur.execute(stmt)
-        con.commit()
+        con.executescript(SCHEMA_SQL)
     finally:
         con.close()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""File I/O helpers shared by the pipeline scripts (datasource, evaluation, cli)."""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+import pandas as pd
+
+
+def file_digest(path: Path) -> str:
+    # content key for the result caches: unlike mtime, it survives a pipeline step rewriting identical bytes
+    return hashlib.blake2b(path.read_bytes(), digest_size=16).hexdigest()
+
+
+def load_panel_close(path: Path) -> pd.DataFrame:
+    # explicit Arrow schema from the header (Date + float64 assets); the table is
+    # handed to pandas without a second copy and released as it is converted
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+
+    with path.open(encoding="utf-8") as fh:
+        header = fh.readline().rstrip("\r\n").split(",")
+    types = {c: pa.float64() for c in header if c != "Date"}
+    types["Date"] = pa.timestamp("ns")
+    table = pacsv.read_csv(path, convert_options=pacsv.ConvertOptions(column_types=types))
+    df = table.to_pandas(self_destruct=True, split_blocks=True)
+    del table
+    df = df.set_index("Date").sort_index()
+    if df.isna().to_numpy().any():
+        bad = df.isna().sum().to_dict()
+        raise ValueError(f"panel_close contains NaNs: {bad}")
+    return df
+
+
+def write_parquet_sibling(df: pd.DataFrame, csv_path: Path) -> None:
+    # typed, columnar copy of a panel for fast re-reads downstream (needs pyarrow)
+    pq_path = csv_path.with_suffix(".parquet")
+    try:
+        df.to_parquet(pq_path)
+    except ImportError:
+        # CSV only; remove a stale sibling so readers do not prefer it
+        pq_path.unlink(missing_ok=True)
+
+
+def write_frame(df: pd.DataFrame, target: Path, fmt: str = "csv") -> Path:
+    """Write df as CSV, or as zstd Parquet next to it (same stem, .parquet suffix). Returns the path written."""
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        target = target.with_suffix(".parquet")
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), target, compression="zstd")
+    else:
+        df.to_csv(target, index=False)
+    return target
@@ -3,7 +3,10 @@ from __future__ import annotations
 
 import argparse, json, sqlite3
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
+from typing import Iterable, Sequence
 
 import pandas as pd
 
@@ -12,71 +15,104 @@ def connect(db_path: Path) -> sqlite3.Connection:
     db_path.parent.mkdir(parents=True, exist_ok=True)
     con = sqlite3.connect(db_path)
     con.execute("PRAGMA foreign_keys=ON;")
+    # WAL + NORMAL sync fsyncs only at checkpoints (checkpoint every ~10k pages, not the default 1k);
+    # bigger cache, mmap reads and in-memory temp for the bulk upserts
     con.execute("PRAGMA journal_mode=WAL;")
+    con.execute("PRAGMA synchronous=NORMAL;")
+    con.execute("PRAGMA wal_autocheckpoint=10000;")
+    con.execute("PRAGMA temp_store=MEMORY;")
+    con.execute("PRAGMA cache_size=-65536;")
+    con.execute("PRAGMA mmap_size=268435456;")
     return con
 
 
-def ensure_schema(con: sqlite3.Connection, schema_path: Path) -> None:
-    sql = schema_path.read_text(encoding="utf-8")
-    con.executescript(sql)
-    con.commit()
+def _executemany_chunked(con: sqlite3.Connection, sql: str, rows: Iterable[Sequence], chunk: int = 10_000) -> None:
+    # bounded batches: the statement stays prepared, rows are never all bound at once
+    it = iter(rows)
+    while batch := list(islice(it, chunk)):
+        con.executemany(sql, batch)
 
 
-def upsert_market_from_panels(con, panel_close: Path, panel_returns: Path) -> list[str]:
-    close = pd.read_csv(panel_close, parse_dates=["Date"]).set_index("Date")
-    rets = pd.read_csv(panel_returns, parse_dates=["Date"]).set_index("Date")
+@lru_cache(maxsize=None)
+def _schema_sql(schema_path: Path) -> str:
+    # read once per process; repeated ingests in one interpreter reuse the text
+    return schema_path.read_text(encoding="utf-8")
 
-    assets = list(close.columns)
 
-    rows = []
-    for dt, r in close.iterrows():
-        asof = dt.strftime("%Y-%m-%d")
-        for a in assets:
-            c = float(r[a])
-            ret = None
-            if dt in rets.index:
-                try:
-                    ret = float(rets.loc[dt, a])
-                except Exception:
-                    ret = None
-            rows.append((asof, a, c, ret))
+def ensure_schema(con: sqlite3.Connection, schema_path: Path) -> None:
+    sql = _schema_sql(schema_path)
+    # executescript runs outside the ingest transaction (it commits anything pending first), so no extra commit
+    con.executescript(sql)
 
-    con.executemany(
-        """
-        INSERT INTO market_daily(asof_date, asset, close, ret_1d)
-        VALUES(?,?,?,?)
-        ON CONFLICT(asof_date, asset)
-        DO UPDATE SET close=excluded.close, ret_1d=excluded.ret_1d
-        """,
-        rows,
+
+def upsert_market_from_panels(con, panel_close: Path, panel_returns: Path, chunksize: int = 50_000) -> list[str]:
+    # both panels are streamed in row chunks, so peak memory does not grow with the panel length
+    read = dict(
+        parse_dates=["Date"], date_format="%Y-%m-%d", index_col="Date", chunksize=chunksize, float_precision="round_trip"
     )
-    con.commit()
+    assets = list(pd.read_csv(panel_close, nrows=0, index_col="Date").columns)
+    pending = None  # returns rows read ahead of the current close chunk
+
+    # both readers are closed on exit, including when the close loop stops early or raises
+    with pd.read_csv(panel_returns, **read) as rets_chunks, pd.read_csv(panel_close, **read) as close_chunks:
+        for close in close_chunks:
+            nxt = next(rets_chunks, None)
+            if nxt is not None:
+                pending = nxt if pending is None else pd.concat([pending, nxt])
+            if pending is None:
+                pending = pd.DataFrame(index=pd.DatetimeIndex([], name="Date"), columns=close.columns, dtype="float64")
+            ahead = pending.index > close.index[-1]
+            rets, pending = pending[~ahead], pending[ahead]
+
+            # long (date, asset) rows in one reshape; the first date has no return -> NULL
+            # (future_stack keeps NaN cells, so close drops them as the legacy stack did)
+            long = (
+                close.stack(future_stack=True).dropna().rename("close").to_frame()
+                .join(rets.stack(future_stack=True).rename("ret_1d"), how="left")
+            )
+            ret = long["ret_1d"].astype(object).where(long["ret_1d"].notna(), None)
+            rows = zip(
+                long.index.get_level_values(0).strftime("%Y-%m-%d"),
+                long.index.get_level_values(1),
+                long["close"].astype(float),
+                ret,
+            )
+
+            _executemany_chunked(
+                con,
+                """
+                INSERT INTO market_daily(asof_date, asset, close, ret_1d)
+                VALUES(?,?,?,?)
+                ON CONFLICT(asof_date, asset)
+                DO UPDATE SET close=excluded.close, ret_1d=excluded.ret_1d
+                """,
+                rows,
+            )
     return assets
 
 
 def upsert_baseline(con, equity_csv: Path, trades_csv: Path) -> None:
     eq = pd.read_csv(equity_csv)
     # equity table
-    con.executemany(
+    _executemany_chunked(
+        con,
         """
         INSERT INTO baseline_equity(asof_date, equity, cash)
         VALUES(?,?,?)
         ON CONFLICT(asof_date) DO UPDATE SET equity=excluded.equity, cash=excluded.cash
         """,
-        [(r["Date"], float(r["equity"]), float(r["cash"])) for _, r in eq.iterrows()],
+        list(zip(eq["Date"], eq["equity"].astype(float), eq["cash"].astype(float))),
     )
 
     # positions snapshot per day (qty_*, val_*)
-    assets = sorted({c.replace("qty_", "") for c in eq.columns if c.startswith("qty_")})
-    pos_rows = []
-    for _, r in eq.iterrows():
-        d = r["Date"]
-        for a in assets:
-            qty = float(r.get(f"qty_{a}", 0.0))
-            val = float(r.get(f"val_{a}", 0.0))
-            pos_rows.append((d, a, qty, val))
-
-    con.executemany(
+    # wide qty_<A>/val_<A> -> long (Date, asset, qty, val) in one reshape; a missing val_<A> counts as 0
+    wide = eq[["Date"] + [c for c in eq.columns if c.startswith(("qty_", "val_"))]]
+    long = pd.wide_to_long(wide, stubnames=["qty", "val"], i="Date", j="asset", sep="_", suffix=".+").reset_index()
+    long = long.reindex(columns=["Date", "asset", "qty", "val"]).fillna({"qty": 0.0, "val": 0.0})
+    pos_rows = list(zip(long["Date"], long["asset"], long["qty"].astype(float), long["val"].astype(float)))
+
+    _executemany_chunked(
+        con,
         """
         INSERT INTO baseline_positions(asof_date, asset, qty, value)
         VALUES(?,?,?,?)
@@ -88,12 +124,13 @@ def upsert_baseline(con, equity_csv: Path, trades_csv: Path) -> None:
     # trades
     tr = pd.read_csv(trades_csv)
     if len(tr) > 0:
-        trade_rows = [
-            (r["Date"], r["asset"], r["side"], float(r["qty"]), float(r["price"]), float(r["notional"]), float(r["fee_total"]))
-            for _, r in tr.iterrows()
-        ]
+        trade_rows = list(zip(
+            tr["Date"], tr["asset"], tr["side"],
+            tr["qty"].astype(float), tr["price"].astype(float), tr["notional"].astype(float), tr["fee_total"].astype(float),
+        ))
         con.execute("DELETE FROM baseline_trades")  # jednoduché MVP (později incremental)
-        con.executemany(
+        _executemany_chunked(
+            con,
             """
             INSERT INTO baseline_trades(asof_date, asset, side, qty, price, notional, fee_total)
             VALUES(?,?,?,?,?,?,?)
@@ -101,8 +138,6 @@ def upsert_baseline(con, equity_csv: Path, trades_csv: Path) -> None:
             trade_rows,
         )
 
-    con.commit()
-
 
 def register_run(con, asof_date: str, universe: list[str], source_dir: str, notes: str | None) -> str:
     run_id = f"{asof_date}-{datetime.utcnow().strftime('%H%M%S')}"
@@ -113,7 +148,6 @@ def register_run(con, asof_date: str, universe: list[str], source_dir: str, note
         """,
         (run_id, asof_date, datetime.utcnow().isoformat(timespec="seconds"), json.dumps(universe), source_dir, notes or ""),
     )
-    con.commit()
     return run_id
 
 
@@ -140,13 +174,14 @@ def main() -> int:
     ensure_schema(con, Path(args.schema))
 
     # infer asof from panel_close
-    close_df = pd.read_csv(panel_close)
-    inferred_asof = close_df["Date"].iloc[-1]
+    inferred_asof = pd.read_csv(panel_close, engine="pyarrow", usecols=["Date"], dtype={"Date": str})["Date"].iloc[-1]
     asof = args.asof or inferred_asof
 
-    universe = upsert_market_from_panels(con, panel_close, panel_returns)
-    upsert_baseline(con, equity_csv, trades_csv)
-    register_run(con, asof, universe, str(base), args.notes)
+    # one transaction for the whole ingest: a single commit, and a failed step leaves no partial run
+    with con:
+        universe = upsert_market_from_panels(con, panel_close, panel_returns)
+        upsert_baseline(con, equity_csv, trades_csv)
+        register_run(con, asof, universe, str(base), args.notes)
 
     print(f"OK: ingested asof={asof} universe={universe} db={args.db}")
     return 0
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+EVAL = Path(__file__).resolve().parents[1] / "engine" / "evaluation"
+if str(EVAL) not in sys.path:
+    sys.path.insert(0, str(EVAL))
+
+from _drawdown import _max_drawdown_numpy, max_drawdown  # noqa: E402
+
+
+def _loop_reference(c: np.ndarray) -> float:
+    # plain running-max loop; NaN days are skipped
+    m = -np.inf
+    dd = 0.0
+    for x in c:
+        if np.isnan(x):
+            continue
+        m = max(m, x)
+        dd = min(dd, x / m - 1.0)
+    return dd
+
+
+class MaxDrawdownTest(unittest.TestCase):
+    def test_empty(self) -> None:
+        self.assertEqual(max_drawdown(np.array([])), 0.0)
+
+    def test_all_nan(self) -> None:
+        self.assertTrue(np.isnan(max_drawdown(np.array([np.nan, np.nan]))))
+
+    def test_leading_nan(self) -> None:
+        self.assertAlmostEqual(max_drawdown(np.array([np.nan, 90.0, 80.0, 95.0])), 80.0 / 90.0 - 1.0)
+
+    def test_nan_inside(self) -> None:
+        self.assertAlmostEqual(max_drawdown(np.array([5.0, 4.0, np.nan, 6.0])), -0.2)
+
+    def test_monotone(self) -> None:
+        self.assertEqual(max_drawdown(np.array([100.0])), 0.0)
+        self.assertEqual(max_drawdown(np.arange(1.0, 50.0)), 0.0)
+        self.assertAlmostEqual(max_drawdown(np.arange(50.0, 0.0, -1.0)), 1.0 / 50.0 - 1.0)
+
+    def test_numpy_matches_loop_and_pandas(self) -> None:
+        rng = np.random.default_rng(0)
+        cases = [np.cumprod(1.0 + rng.normal(0.0, 0.02, 2000)) * 100.0 for _ in range(50)]
+        nan_inside = cases[0].copy()
+        nan_inside[[0, 5, 700, 1999]] = np.nan
+        cases.append(nan_inside)
+        for c in cases:
+            got = _max_drawdown_numpy(c)
+            s = pd.Series(c)
+            self.assertEqual(got, _loop_reference(c))
+            self.assertEqual(got, float((s / s.cummax() - 1).min()))
+            self.assertEqual(max_drawdown(c), got)
+
+
+if __name__ == "__main__":
+    unittest.main()